@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Category, Product, ProductImage, Order, OrderItem
+from .models import User, Category, DiscountTier, Product, ProductImage, Order, OrderItem, SellerSales, Task
 
 
 class UserAdmin(BaseUserAdmin):
@@ -26,12 +26,32 @@ class OrderItemInline(admin.TabularInline):
 
 
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('order_number', 'buyer', 'status', 'created_at')
+    list_display = ('order_number', 'buyer', 'status', 'grand_total', 'created_at')
+    readonly_fields = ('items_subtotal', 'grand_total')
     inlines = [OrderItemInline]
     list_filter = ('status',)
 
 
+class SellerSalesAdmin(admin.ModelAdmin):
+    list_display = ('seller', 'total', 'updated_at')
+    readonly_fields = ('seller', 'total', 'updated_at')
+
+
+class DiscountTierAdmin(admin.ModelAdmin):
+    list_display = ('min_quantity', 'percent', 'sellers_only', 'active')
+    list_editable = ('percent', 'sellers_only', 'active')
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_at', 'last_error', 'created_at')
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Category)
 admin.site.register(Product, ProductAdmin)
 admin.site.register(Order, OrderAdmin)
+admin.site.register(DiscountTier, DiscountTierAdmin)
+admin.site.register(SellerSales, SellerSalesAdmin)
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,223 @@
+"""Read-only JSON API (``/api/v1/``) for the mobile app and ERP integrations.
+
+Lists are cursor-paginated, ``?fields=a,b`` trims every object to the named
+fields (and skips the joins/prefetches the dropped fields would need), and
+GET responses carry an ETag (single products also a Last-Modified) so clients
+revalidating an unchanged resource get an empty 304. Anonymous responses are
+marked public for browsers and a CDN.
+"""
+import csv
+import hashlib
+
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import caching, geo, inventory, search
+from .models import Category, Order, OrderItem, Product, User
+from .serializers import (
+    CategorySerializer,
+    OrderSerializer,
+    ProductSerializer,
+    SellerSerializer,
+    requested_fields,
+)
+
+
+class NewestFirstPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProductPagination(NewestFirstPagination):
+    def get_ordering(self, request, queryset, view):
+        # sort=distance (with lat/lng) pages nearest seller first, searches best match first
+        location = geo.location_params(request.query_params)
+        if location is not None and location[3]:
+            return ('distance_order', '-created_at', '-id')
+        if request.query_params.get('q', '').strip():
+            return ('-search_rank', '-created_at', '-id')
+        return self.ordering
+
+
+class SellerPagination(NewestFirstPagination):
+    ordering = ('username',)
+
+
+class ConditionalGetMixin:
+    """Tag GET responses with an ETag and answer ``If-None-Match`` with 304.
+
+    The ETag is a hash of the rendered body, unless ``list_etag()`` gives a
+    validator for lists: then it is checked before the list is queried and
+    serialized, so a 304 costs only the validator. A view that sets
+    ``self.last_modified`` (a datetime) also gets a Last-Modified header and
+    ``If-Modified-Since`` support.
+    """
+    last_modified = None
+    etag = None
+
+    def list_etag(self, request):
+        """A string that changes whenever the list could, or None to hash the body."""
+        return None
+
+    def list(self, request, *args, **kwargs):
+        validator = self.list_etag(request)
+        if validator is not None:
+            # the same data can still be paged, trimmed or rendered differently
+            key = f'{validator}:{request.get_full_path()}:{request.accepted_media_type}'
+            self.etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            not_modified = get_conditional_response(request, etag=self.etag)
+            if not_modified is not None:
+                return not_modified
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+            return response
+        etag = self.etag
+        if etag is None:
+            response.render()
+            etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response['ETag'] = etag
+        last_modified = int(self.last_modified.timestamp()) if self.last_modified else None
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(response, public=True, max_age=caching.public_max_age())
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+        if response.status_code == 304:
+            return response
+        return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def product_queryset(request):
+    """Products with only the joins and prefetches that the requested fields need."""
+    fields = requested_fields(request)
+    qs = Product.objects.all()
+    if fields is None or 'seller_name' in fields:
+        qs = qs.select_related('seller')
+    if fields is None or 'category_name' in fields:
+        qs = qs.select_related('category')
+    if fields is None or fields & {'image', 'image_webp'}:
+        qs = qs.with_images()
+    return qs
+
+
+class ProductViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Catalog with the same search (``q``), filters and location (``lat``/``lng`` with
+    ``within_km`` and/or ``sort=distance``) as the home page, plus ``seller``."""
+    serializer_class = ProductSerializer
+    pagination_class = ProductPagination
+
+    def list_etag(self, request):
+        return caching.catalog_etag(request)
+
+    def get_queryset(self):
+        qs = product_queryset(self.request)
+        if self.action != 'list':
+            return qs
+        params = self.request.query_params
+        seller = params.get('seller', '')
+        if seller.isdigit():
+            qs = qs.filter(seller_id=int(seller))
+        q = params.get('q', '').strip()
+        if q:
+            qs = search.search(qs, q)
+        qs = search.apply_filters(qs, params)
+        return geo.apply_location(qs, params)[0]
+
+    def retrieve(self, request, *args, **kwargs):
+        product = self.get_object()
+        self.last_modified = product.updated_at
+        return Response(self.get_serializer(product).data)
+
+
+class CategoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = CategorySerializer
+    pagination_class = None
+    queryset = Category.objects.order_by('name')
+
+    def list_etag(self, request):
+        return caching.catalog_etag(request)
+
+
+class SellerViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Seller profiles; ``/sellers/<id>/products/`` is the seller's store."""
+    serializer_class = SellerSerializer
+    pagination_class = SellerPagination
+    queryset = User.objects.filter(is_seller=True)
+
+    @action(detail=True, serializer_class=ProductSerializer, pagination_class=NewestFirstPagination)
+    def products(self, request, pk=None):
+        seller = self.get_object()
+        page = self.paginate_queryset(product_queryset(request).filter(seller=seller))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class OrderViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """The authenticated user's orders, optionally filtered by ``status``."""
+    serializer_class = OrderSerializer
+    pagination_class = NewestFirstPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        qs = Order.objects.filter(buyer=self.request.user)
+        status = self.request.query_params.get('status')
+        if status in dict(Order.ORDER_STATUS):
+            qs = qs.filter(status=status)
+        fields = requested_fields(self.request)
+        if fields is None or 'items' in fields:
+            qs = qs.prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('product').only(
+                    'order', 'product', 'product__name', 'quantity', 'price', 'delivery_fee'
+                ).order_by('pk'))
+            )
+        return qs
+
+
+class CSVParser(BaseParser):
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read()
+
+
+class IsSeller(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_seller)
+
+
+class InventoryUpdateView(APIView):
+    """Bulk price/stock update for the seller's own products (see ``core.inventory``).
+
+    Accepts a JSON list of rows (or ``{"rows": [...]}``), a ``text/csv`` body,
+    or a multipart ``file`` upload in either format.
+    """
+    permission_classes = [IsSeller]
+    parser_classes = [JSONParser, CSVParser, MultiPartParser]
+
+    def post(self, request):
+        if 'file' in request.FILES:
+            rows = inventory.read_rows(request.FILES['file'])
+        elif isinstance(request.data, bytes):
+            rows = inventory.read_rows(request.data, 'csv')
+        else:
+            rows = request.data.get('rows') if isinstance(request.data, dict) else request.data
+            if not isinstance(rows, list):
+                return Response({'detail': 'Expected a list of rows.'}, status=400)
+        try:
+            result = inventory.apply_updates(request.user, rows)
+        except (ValueError, csv.Error) as exc:
+            return Response({'detail': f'Could not read input: {exc}'}, status=400)
+        return Response(result)
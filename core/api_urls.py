@@ -0,0 +1,14 @@
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+
+from .api import CategoryViewSet, InventoryUpdateView, OrderViewSet, ProductViewSet, SellerViewSet
+
+router = DefaultRouter()
+router.register('products', ProductViewSet, basename='api-product')
+router.register('categories', CategoryViewSet, basename='api-category')
+router.register('sellers', SellerViewSet, basename='api-seller')
+router.register('orders', OrderViewSet, basename='api-order')
+
+urlpatterns = [
+    path('inventory/', InventoryUpdateView.as_view(), name='api-inventory'),
+] + router.urls
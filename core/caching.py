@@ -0,0 +1,277 @@
+"""Versioned cache namespaces.
+
+Cached entries embed a namespace version in their key; bumping the version
+(from the model signals in ``core.signals``) makes every older entry
+unreachable without having to know or delete the individual keys.
+
+Namespaces: ``catalog`` (any product, image, category or seller change),
+``categories``, ``seller_store:<seller id>`` and ``product:<id>`` (stock
+changes from checkout). Built on them are the category list, rendered
+product cards and whole pages for anonymous visitors. Hits and misses are
+counted per cache under ``stats:`` keys (``manage.py cache_stats``).
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+
+from . import prometheus
+
+CATALOG = 'catalog'
+CATEGORIES = 'categories'
+STATS = ('page', 'product_card', 'categories', 'seller_store')
+
+
+def _version_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = 1
+        cache.add(_version_key(namespace), version, None)
+    return version
+
+
+def namespace_versions(namespaces):
+    """``{namespace: version}`` for several namespaces in one cache round trip."""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, ns in keys.items():
+        if key not in found:
+            cache.add(key, 1, None)
+        versions[ns] = found.get(key, 1)
+    return versions
+
+
+def bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, None)
+
+
+def seller_store_namespace(seller_id):
+    return f'seller_store:{seller_id}'
+
+
+def seller_store_key(seller_id, cursor):
+    namespace = seller_store_namespace(seller_id)
+    return f'{namespace}:v{namespace_version(namespace)}:page:{cursor or "first"}'
+
+
+def seller_store_timeout():
+    return getattr(settings, 'SELLER_STORE_CACHE_TIMEOUT', 600)
+
+
+def invalidate_seller_store(seller_id):
+    # the seller's products also appear on the home page and product pages
+    if seller_id is not None:
+        bump(seller_store_namespace(seller_id))
+    bump(CATALOG)
+
+
+def invalidate_categories():
+    bump(CATEGORIES)
+    bump(CATALOG)
+
+
+def product_namespace(product_id):
+    return f'product:{product_id}'
+
+
+def invalidate_products(product_ids):
+    """Expire the cached pages of these products (checkout changes their stock without saving them)."""
+    for product_id in product_ids:
+        bump(product_namespace(product_id))
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+
+
+def public_max_age():
+    return getattr(settings, 'PUBLIC_CACHE_MAX_AGE', 60)
+
+
+# --- hit/miss counters ----------------------------------------------------
+
+def record(name, hit, count=1):
+    """Count ``count`` hits (or misses) of the ``name`` cache."""
+    if not count:
+        return
+    prometheus.CACHE_REQUESTS.inc(count, cache=name, result='hit' if hit else 'miss')
+    key = f'stats:{name}:{"hits" if hit else "misses"}'
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        if not cache.add(key, count, None):
+            cache.incr(key, count)
+
+
+def stats():
+    """``{name: {'hits', 'misses', 'hit_rate'}}`` for each cache since the last reset."""
+    keys = [f'stats:{name}:{kind}' for name in STATS for kind in ('hits', 'misses')]
+    found = cache.get_many(keys)
+    result = {}
+    for name in STATS:
+        hits = found.get(f'stats:{name}:hits', 0)
+        misses = found.get(f'stats:{name}:misses', 0)
+        result[name] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else None}
+    return result
+
+
+def reset_stats():
+    cache.delete_many([f'stats:{name}:{kind}' for name in STATS for kind in ('hits', 'misses')])
+
+
+# --- cached data and fragments ----------------------------------------------
+
+def category_list():
+    """All categories as ``[{'id', 'name'}]``, sorted by name."""
+    from .models import Category
+
+    key = f'{CATEGORIES}:v{namespace_version(CATEGORIES)}:list'
+    categories = cache.get(key)
+    record('categories', categories is not None)
+    if categories is None:
+        categories = list(Category.objects.order_by('name').values('id', 'name'))
+        cache.set(key, categories, fragment_timeout())
+    return categories
+
+
+def catalog_etag(request, *args, **kwargs):
+    """Validator for catalog listings: changes with any product or category edit, addition or removal."""
+    from django.db.models import Count, Max
+
+    from .models import Category, Product
+
+    key = f'{CATALOG}:v{namespace_version(CATALOG)}:etag'
+    etag = cache.get(key)
+    if etag is None:
+        products = Product.objects.aggregate(changed=Max('updated_at'), count=Count('id'))
+        categories = Category.objects.aggregate(changed=Max('updated_at'), count=Count('id'))
+        etag = hashlib.md5(f'{products}{categories}'.encode()).hexdigest()
+        cache.set(key, etag, page_timeout())
+    return etag
+
+
+def attach_cards(products, template_name='product_card.html'):
+    """Set ``card_html`` on each product, rendering only the cards missing from the cache.
+
+    Cards are keyed by the seller's store version, so they expire with the
+    seller's product and image changes. Returns the products as a list.
+    """
+    products = list(products)
+    versions = namespace_versions({seller_store_namespace(p.seller_id) for p in products})
+    keys = {
+        p.pk: f'card:{template_name}:{p.pk}:v{versions[seller_store_namespace(p.seller_id)]}'
+        for p in products
+    }
+    found = cache.get_many(keys.values())
+    rendered = {}
+    misses = 0
+    for p in products:
+        html = found.get(keys[p.pk])
+        if html is None:
+            misses += 1
+            html = rendered[keys[p.pk]] = render_to_string(template_name, {'p': p})
+        p.card_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, fragment_timeout())
+    record('product_card', True, len(products) - misses)
+    record('product_card', False, misses)
+    return products
+
+
+# --- whole pages for anonymous visitors ------------------------------------
+
+def _shareable(request):
+    # anyone whose page can differ from everyone else's (signed in, has a cart, has a flash message) is skipped
+    from .carts import LEGACY_SESSION_KEY, SESSION_KEY
+
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    session = request.session
+    if session.get(SESSION_KEY) or session.get(LEGACY_SESSION_KEY):
+        return False
+    return not len(messages.get_messages(request))
+
+
+def page_key(request, namespaces):
+    versions = namespace_versions(namespaces)
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    stamp = '.'.join(f'{versions[ns]}' for ns in namespaces)
+    return f'page:{stamp}:{digest}'
+
+
+def cache_anonymous_page(namespaces):
+    """View decorator caching the page for anonymous visitors, per path and query string.
+
+    ``namespaces(request, *args, **kwargs)`` names the namespaces whose bump expires the page.
+    Responses carry ``X-Cache: HIT`` or ``MISS``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not _shareable(request):
+                return view(request, *args, **kwargs)
+            key = page_key(request, namespaces(request, *args, **kwargs))
+            cached = cache.get(key)
+            record('page', cached is not None)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            # never share a page carrying a visitor's CSRF token
+            if (response.status_code == 200 and not response.streaming
+                    and b'name="csrfmiddlewaretoken" value=' not in response.content):
+                cache.set(key, (response.content, response['Content-Type']), page_timeout())
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapped
+    return decorator
+
+
+def conditional_page(etag_func=None, last_modified_func=None):
+    """View decorator: conditional GET and public caching for the pages ``cache_anonymous_page`` shares.
+
+    For those visitors the view is wrapped in Django's ``condition`` (so a
+    matching ``If-None-Match``/``If-Modified-Since`` gets an empty 304) and the
+    response is marked ``public`` for browsers and a CDN. Everyone else gets
+    ``private`` and no validators, since their page can change without the
+    catalog changing (cart badge, messages).
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not _shareable(request):
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, private=True)
+                return response
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, public=True, max_age=public_max_age())
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapped
+    return decorator
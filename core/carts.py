@@ -0,0 +1,138 @@
+"""Shopping carts stored as rows instead of a pickled session dict.
+
+Each cart line is one ``CartItem``, so adding a product or changing a
+quantity is a single-row write (the old ``request.session['cart']`` dict
+rewrote the whole session blob on every change). Signed-in users have one
+cart (``Cart.user``), which follows them across devices; an anonymous
+visitor's cart is found through ``cart_id`` in the session, written once when
+the cart is created and merged into the user's cart on login.
+``purge_abandoned`` deletes carts nobody has touched for a while, in batches.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cart, CartItem, Product
+
+SESSION_KEY = 'cart_id'
+LEGACY_SESSION_KEY = 'cart'
+PURGE_BATCH_SIZE = 1000
+
+
+def get_cart(request, create=False):
+    """The visitor's cart, or ``None`` if they have none and ``create`` is false."""
+    user = request.user
+    if user.is_authenticated:
+        cart = Cart.objects.filter(user=user).first()
+        if cart is None and (create or LEGACY_SESSION_KEY in request.session):
+            cart, _ = Cart.objects.get_or_create(user=user)
+    else:
+        cart_id = request.session.get(SESSION_KEY)
+        cart = Cart.objects.filter(pk=cart_id, user__isnull=True).first() if cart_id else None
+        if cart is None and (create or LEGACY_SESSION_KEY in request.session):
+            cart = Cart.objects.create()
+            request.session[SESSION_KEY] = cart.pk
+    if LEGACY_SESSION_KEY in request.session:
+        # carry over a cart saved in the session before carts moved to the database
+        for product_id, item in request.session.pop(LEGACY_SESSION_KEY).items():
+            if Product.objects.filter(pk=product_id).exists():
+                add(cart, int(product_id), int(item.get('quantity', 1)))
+    return cart
+
+
+def add(cart, product_id, quantity):
+    """Add ``quantity`` of a product to the cart (one UPDATE, or one INSERT for a new line)."""
+    updated = CartItem.objects.filter(cart=cart, product_id=product_id).update(
+        quantity=F('quantity') + quantity, updated_at=timezone.now()
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart=cart, product_id=product_id, quantity=quantity)
+    except IntegrityError:
+        # a concurrent request added the line first
+        CartItem.objects.filter(cart=cart, product_id=product_id).update(
+            quantity=F('quantity') + quantity, updated_at=timezone.now()
+        )
+
+
+def set_quantity(cart, product_id, quantity):
+    """Change the quantity of a line already in the cart; zero or less removes it."""
+    if quantity <= 0:
+        remove(cart, product_id)
+        return
+    CartItem.objects.filter(cart=cart, product_id=product_id).update(quantity=quantity, updated_at=timezone.now())
+
+
+def remove(cart, product_id):
+    CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+
+
+def clear(cart):
+    if cart is not None:
+        CartItem.objects.filter(cart=cart).delete()
+
+
+def lines(cart, queryset=None):
+    """``(product, quantity)`` pairs for the cart, in two queries."""
+    if cart is None:
+        return []
+    quantities = dict(CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity'))
+    if not quantities:
+        return []
+    products = (queryset if queryset is not None else Product.objects).filter(id__in=quantities)
+    return [(p, quantities[p.id]) for p in products]
+
+
+def item_count(request):
+    """Number of lines in the visitor's cart for the header badge (one COUNT, none for a visitor without a cart)."""
+    if request.user.is_authenticated:
+        return CartItem.objects.filter(cart__user=request.user).count()
+    cart_id = request.session.get(SESSION_KEY)
+    if not cart_id:
+        return len(request.session.get(LEGACY_SESSION_KEY) or {})
+    return CartItem.objects.filter(cart_id=cart_id).count()
+
+
+def merge_on_login(request, user):
+    """Move the anonymous session cart into ``user``'s cart, adding up quantities."""
+    cart_id = request.session.pop(SESSION_KEY, None)
+    if not cart_id:
+        return
+    anonymous = Cart.objects.filter(pk=cart_id, user__isnull=True).first()
+    if anonymous is None:
+        return
+    with transaction.atomic():
+        own = Cart.objects.filter(user=user).first()
+        if own is None:
+            # nothing to merge into: the anonymous cart becomes the user's
+            Cart.objects.filter(pk=anonymous.pk).update(user=user)
+            return
+        for product_id, quantity in anonymous.items.values_list('product_id', 'quantity'):
+            add(own, product_id, quantity)
+        anonymous.delete()
+
+
+def abandoned(cutoff, include_users=False):
+    """Carts created before ``cutoff`` with no line touched since."""
+    qs = Cart.objects.filter(created_at__lt=cutoff).exclude(items__updated_at__gte=cutoff)
+    if not include_users:
+        qs = qs.filter(user__isnull=True)
+    return qs
+
+
+def purge_abandoned(days=30, include_users=False, batch_size=PURGE_BATCH_SIZE):
+    """Delete abandoned carts ``batch_size`` at a time; returns the number of carts deleted."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(abandoned(cutoff, include_users).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            CartItem.objects.filter(cart_id__in=ids).delete()
+            Cart.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
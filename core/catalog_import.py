@@ -0,0 +1,238 @@
+"""Streaming catalog import for onboarding sellers.
+
+Reads a CSV or JSON Lines file one row at a time and creates the seller's
+products in batches with ``bulk_create``. Categories are resolved by name from
+an in-memory cache (created on first use), and images named in the ``image``
+column are read from a local directory or zip archive. Only one batch is held
+in memory, so memory use does not depend on the size of the file.
+
+Columns: ``name`` and ``price`` are required; ``description``, ``unit``,
+``stock``, ``brand``, ``category``, ``sku`` and ``image`` are optional.
+``image`` may list several files separated by ``|``; the first is the main image.
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from . import caching, inventory, search, tasks
+from .models import Category, Product, ProductImage
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+class RowError(ValueError):
+    pass
+
+
+def iter_rows(fileobj, fmt='csv'):
+    """Yield ``(row_number, dict)`` from a binary file object without reading it all into memory."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                yield number, {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+        elif fmt == 'jsonl':
+            number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+        else:
+            raise ValueError(f'Unsupported format {fmt!r}')
+    finally:
+        # don't let the wrapper close the caller's file
+        text.detach()
+
+
+def guess_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+class ImageSource:
+    """Look up image files by name in a directory or zip archive (matched by path, then by basename)."""
+
+    def __init__(self, path_or_file=None):
+        self.directory = None
+        self.zip = None
+        self._names = {}
+        if path_or_file is None:
+            return
+        if isinstance(path_or_file, str) and os.path.isdir(path_or_file):
+            self.directory = os.path.realpath(path_or_file)
+        else:
+            self.zip = zipfile.ZipFile(path_or_file)
+            for name in self.zip.namelist():
+                if not name.endswith('/'):
+                    self._names.setdefault(name, name)
+                    self._names.setdefault(os.path.basename(name), name)
+
+    def read(self, name):
+        """Return the file's bytes, or ``None`` if it isn't there."""
+        if self.zip is not None:
+            member = self._names.get(name) or self._names.get(os.path.basename(name))
+            return self.zip.read(member) if member else None
+        if self.directory is not None:
+            path = os.path.realpath(os.path.join(self.directory, name))
+            if not path.startswith(self.directory + os.sep) or not os.path.isfile(path):
+                return None
+            with open(path, 'rb') as fh:
+                return fh.read()
+        return None
+
+    def close(self):
+        if self.zip is not None:
+            self.zip.close()
+
+
+class CategoryCache:
+    """Category lookup by case-insensitive name, creating missing ones once."""
+
+    def __init__(self):
+        self._by_name = {c.name.lower(): c for c in Category.objects.all()}
+
+    def get(self, name):
+        name = (name or '').strip()
+        if not name:
+            return None
+        category = self._by_name.get(name.lower())
+        if category is None:
+            category = Category.objects.create(name=name[:100])
+            self._by_name[name.lower()] = category
+        return category
+
+
+def build_product(seller, row, categories):
+    """Return ``(unsaved Product, [image names])`` for one row or raise ``RowError``."""
+    if not isinstance(row, dict):
+        raise RowError('row is not a valid JSON object')
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise RowError('name is required')
+    if row.get('price') in (None, ''):
+        raise RowError('price is required')
+    try:
+        price = inventory.parse_price(row['price'])
+    except inventory.RowError as exc:
+        raise RowError(str(exc))
+    stock = row.get('stock') or 0
+    try:
+        stock = int(stock)
+    except (TypeError, ValueError, ArithmeticError):
+        raise RowError(f'invalid stock {stock!r}')
+    if stock < 0:
+        raise RowError('stock cannot be negative')
+    product = Product(
+        seller=seller,
+        name=name[:255],
+        description=str(row.get('description') or ''),
+        price=price,
+        unit=str(row.get('unit') or 'pcs')[:50],
+        stock=stock,
+        brand=str(row.get('brand') or '')[:100],
+        sku=str(row.get('sku') or '').strip()[:64] or None,
+        category=categories.get(str(row.get('category') or '')),
+    )
+    images = [n.strip() for n in str(row.get('image') or row.get('images') or '').split('|') if n.strip()]
+    return product, images
+
+
+class Importer:
+    """Import rows for one seller. ``progress(stats)`` is called after each batch."""
+
+    def __init__(self, seller, images=None, batch_size=BATCH_SIZE, progress=None):
+        self.seller = seller
+        self.images = images or ImageSource()
+        self.batch_size = batch_size
+        self.progress = progress
+        self.categories = CategoryCache()
+        self.stats = {'rows': 0, 'created': 0, 'images': 0, 'error_count': 0, 'errors': []}
+        self._batch = []
+
+    def error(self, row_number, message):
+        self.stats['error_count'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'row': row_number, 'error': message})
+
+    def run(self, rows):
+        for row_number, row in rows:
+            self.stats['rows'] += 1
+            try:
+                product, image_names = build_product(self.seller, row, self.categories)
+            except RowError as exc:
+                self.error(row_number, str(exc))
+                continue
+            self._batch.append((row_number, product, image_names))
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+        if self.stats['created']:
+            caching.invalidate_seller_store(self.seller.pk)
+        self.stats['errors'].sort(key=lambda e: e['row'])
+        return self.stats
+
+    def _drop_duplicate_skus(self):
+        skus = [p.sku for _, p, _ in self._batch if p.sku]
+        taken = set(Product.objects.filter(seller=self.seller, sku__in=skus).values_list('sku', flat=True))
+        kept = []
+        for row_number, product, image_names in self._batch:
+            if product.sku and product.sku in taken:
+                self.error(row_number, f'sku {product.sku!r} already exists')
+                continue
+            if product.sku:
+                taken.add(product.sku)
+            kept.append((row_number, product, image_names))
+        return kept
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch = self._drop_duplicate_skus()
+        self._batch = []
+        image_ids = []
+        product_images = []
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create([product for _, product, _ in batch])
+                for row_number, product, image_names in batch:
+                    for image_name in image_names:
+                        if not image_name.lower().endswith(IMAGE_EXTENSIONS):
+                            self.error(row_number, f'image {image_name!r} is not a supported image type')
+                            continue
+                        data = self.images.read(image_name)
+                        if data is None:
+                            self.error(row_number, f'image {image_name!r} not found')
+                            continue
+                        product_image = ProductImage(product=product)
+                        product_image.image.save(os.path.basename(image_name), ContentFile(data), save=False)
+                        product_images.append(product_image)
+                ProductImage.objects.bulk_create(product_images)
+                image_ids = [img.pk for img in product_images]
+                # bulk_create skips post_save, so index the batch here
+                search.index_products(product for _, product, _ in batch)
+                if image_ids:
+                    tasks.generate_thumbnails_for.delay(image_ids=image_ids)
+        except Exception:
+            # the batch was rolled back; don't leave its image files behind in storage
+            for product_image in product_images:
+                product_image.image.delete(save=False)
+            raise
+        self.stats['created'] += len(batch)
+        self.stats['images'] += len(image_ids)
+        if self.progress:
+            self.progress(self.stats)
+
+
+def import_catalog(seller, fileobj, fmt='csv', images=None, batch_size=BATCH_SIZE, progress=None):
+    """Import a CSV/JSONL catalog for ``seller``. Returns the stats dict."""
+    return Importer(seller, images, batch_size, progress).run(iter_rows(fileobj, fmt))
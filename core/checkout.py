@@ -0,0 +1,106 @@
+"""Transactional order placement.
+
+``place_order`` reserves stock with conditional UPDATEs
+(``UPDATE product SET stock = stock - qty WHERE id = ? AND stock >= qty``),
+creates the order and its items in a single transaction and retries when the
+database reports lock contention. Two buyers racing for the last unit can no
+longer both succeed, and a failure part-way leaves nothing behind.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.db import OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching, delivery, prometheus, tasks
+from .models import Order, OrderItem, Product
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.02  # seconds
+
+
+class OutOfStock(Exception):
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(f'Not enough stock for {product.name} (requested {requested})')
+
+
+def _reserve_stock(items):
+    # lock rows in a stable order so concurrent checkouts can't deadlock each other
+    for it in sorted(items, key=lambda it: it['product'].pk):
+        reserved = Product.objects.filter(pk=it['product'].pk, stock__gte=it['quantity']).update(
+            stock=F('stock') - it['quantity'], updated_at=timezone.now()
+        )
+        if not reserved:
+            raise OutOfStock(it['product'], it['quantity'])
+
+
+def _place_order_once(buyer, items, address, lat, lng):
+    with transaction.atomic():
+        _reserve_stock(items)
+        fees = delivery.quote(items, lat, lng)
+        # totals are computed once here, in Decimal, and stored on the order
+        items_subtotal = sum((it['unit_price'] * it['quantity'] for it in items), Decimal('0.00'))
+        order = Order.objects.create(
+            buyer=buyer,
+            delivery_address=address,
+            delivery_fee=fees['total'],
+            delivery_lat=lat,
+            delivery_lng=lng,
+            items_subtotal=items_subtotal,
+            grand_total=items_subtotal + fees['total'],
+            status='pending',
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=it['product'],
+                quantity=it['quantity'],
+                price=it['unit_price'],
+                delivery_fee=fee,
+            )
+            for it, fee in zip(items, fees['fees'])
+        ])
+        tasks.notify_order_placed.delay(order_id=order.pk)
+        # the reserved stock shows on the product pages
+        product_ids = [it['product'].pk for it in items]
+        transaction.on_commit(lambda: caching.invalidate_products(product_ids))
+    return order
+
+
+def place_order(buyer, items, address='', lat=None, lng=None):
+    """Create an order for ``items`` (dicts with ``product``, ``quantity`` and ``unit_price``).
+
+    Raises ``OutOfStock`` if any product lacks the requested quantity; in that
+    case no stock is reserved and no order is written.
+    """
+    items = [it for it in items if it['quantity'] > 0]
+    if not items:
+        raise ValueError('Cannot place an empty order')
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        order = _place_order_with_retries(buyer, items, address, lat, lng)
+        outcome = 'ok'
+    except OutOfStock:
+        outcome = 'out_of_stock'
+        raise
+    finally:
+        prometheus.CHECKOUT_DURATION.observe(time.perf_counter() - start, outcome=outcome)
+    prometheus.ORDERS_CREATED.inc()
+    prometheus.CHECKOUT_LINES.observe(len(items))
+    return order
+
+
+def _place_order_with_retries(buyer, items, address, lat, lng):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return _place_order_once(buyer, items, address, lat, lng)
+        except OperationalError:
+            # "database is locked" / serialization failures: back off and retry
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** attempt * random.random())
@@ -5,7 +5,7 @@ def sidebar_info(request):
 
     Returns:
       - sidebar_orders_count: number of orders where user is buyer
-      - sidebar_sales_total: total sales amount for seller (sum of order totals containing their products)
+      - sidebar_sales_total: seller's delivered sales (items + delivery fees) from the sales ledger
       - sidebar_phone: user's default phone_number
       - sidebar_address: user's default_address
     """
@@ -21,17 +21,15 @@ def sidebar_info(request):
         return data
 
     try:
-        # Lazy import models to avoid startup issues when migrations haven't been applied
-        from .models import Order
+        # Lazy import to avoid startup issues when migrations haven't been applied
+        from .ledger import seller_total
 
         # Orders where the current user is the buyer
         data['sidebar_orders_count'] = user.orders.count()
 
-        # If user is a seller, compute total sales amount from DELIVERED orders containing their products
+        # If user is a seller, read their delivered sales from the ledger (one row, see core.ledger)
         if getattr(user, 'is_seller', False):
-            orders = Order.objects.filter(items__product__seller=user, status='delivered').distinct()
-            total = sum(float(order.total) for order in orders)
-            data['sidebar_sales_total'] = round(total, 2)
+            data['sidebar_sales_total'] = seller_total(user)
 
         # Profile quick info
         data['sidebar_phone'] = getattr(user, 'phone_number', '') or ''
@@ -41,3 +39,13 @@ def sidebar_info(request):
         pass
 
     return data
+
+
+def cart_info(request):
+    """Number of lines in the visitor's cart for the header badge."""
+    try:
+        from .carts import item_count
+        return {'cart_count': item_count(request)}
+    except Exception:
+        # same fallback as sidebar_info while migrations are pending
+        return {'cart_count': 0}
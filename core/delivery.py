@@ -0,0 +1,92 @@
+"""Delivery fee quotes.
+
+Every order item is charged ``DELIVERY_BASE_FEE + DELIVERY_PER_KM * distance``
+from its seller (or the fallback store location) to the buyer. Items are
+grouped by seller so each origin's distance is computed once, seller
+coordinates are fetched in a single query, and the distances for all origins
+are computed in one vectorized pass when NumPy is installed.
+"""
+import math
+from decimal import Decimal
+
+from django.conf import settings
+
+from .models import User
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+CENT = Decimal('0.01')
+
+
+def _haversine_numpy(origins, lat, lng):
+    pts = np.radians(np.asarray(origins, dtype=float))
+    phi1, lam1 = pts[:, 0], pts[:, 1]
+    phi2, lam2 = math.radians(lat), math.radians(lng)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * math.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))).tolist()
+
+
+def _haversine_python(origins, lat, lng):
+    phi2, lam2 = math.radians(lat), math.radians(lng)
+    cos_phi2 = math.cos(phi2)
+    out = []
+    for o_lat, o_lng in origins:
+        phi1, lam1 = math.radians(o_lat), math.radians(o_lng)
+        a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * cos_phi2 * math.sin((lam2 - lam1) / 2) ** 2
+        out.append(2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+    return out
+
+
+def distances_km(origins, lat, lng):
+    """Great-circle distances from each ``(lat, lng)`` origin to the destination."""
+    if not origins:
+        return []
+    if np is not None:
+        return _haversine_numpy(origins, lat, lng)
+    return _haversine_python(origins, lat, lng)
+
+
+def _store_origin():
+    return (float(getattr(settings, 'STORE_LAT', 14.599512)), float(getattr(settings, 'STORE_LNG', 120.984222)))
+
+
+def seller_origins(seller_ids):
+    """``{seller_id: (lat, lng)}`` in one query, falling back to the store location."""
+    store = _store_origin()
+    origins = {sid: store for sid in seller_ids}
+    rows = User.objects.filter(pk__in=seller_ids, seller_lat__isnull=False, seller_lng__isnull=False)
+    for pk, s_lat, s_lng in rows.values_list('pk', 'seller_lat', 'seller_lng'):
+        origins[pk] = (float(s_lat), float(s_lng))
+    return origins
+
+
+def quote(items, lat=None, lng=None):
+    """Fee breakdown for ``items`` (dicts with a ``product``) delivered to ``lat``/``lng``.
+
+    Returns ``{'fees': [per item, in order], 'by_seller': {...}, 'total': Decimal}``.
+    Without a destination every item pays the base fee.
+    """
+    base_fee = Decimal(str(getattr(settings, 'DELIVERY_BASE_FEE', 50.0)))
+    per_km = float(getattr(settings, 'DELIVERY_PER_KM', 12.0))
+    seller_ids = sorted({it['product'].seller_id for it in items})
+
+    by_seller = {}
+    if lat is None or lng is None:
+        for sid in seller_ids:
+            by_seller[sid] = {'distance_km': None, 'fee_per_item': base_fee.quantize(CENT), 'items': 0}
+    else:
+        origins = seller_origins(seller_ids)
+        for sid, km in zip(seller_ids, distances_km([origins[sid] for sid in seller_ids], lat, lng)):
+            fee = (base_fee + Decimal(str(per_km * km))).quantize(CENT)
+            by_seller[sid] = {'distance_km': round(km, 2), 'fee_per_item': fee, 'items': 0}
+
+    fees = []
+    for it in items:
+        entry = by_seller[it['product'].seller_id]
+        entry['items'] += 1
+        fees.append(entry['fee_per_item'])
+    return {'fees': fees, 'by_seller': by_seller, 'total': sum(fees, Decimal('0.00'))}
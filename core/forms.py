@@ -38,6 +38,7 @@ class ProfileForm(forms.ModelForm):
 
 
 from .models import Product, ProductImage, Category
+from .tasks import generate_thumbnails
 
 
 class ProductForm(forms.ModelForm):
@@ -45,7 +46,15 @@ class ProductForm(forms.ModelForm):
 
     class Meta:
         model = Product
-        fields = ['name', 'description', 'price', 'unit', 'stock', 'brand', 'category']
+        fields = ['name', 'description', 'price', 'unit', 'stock', 'brand', 'sku', 'category']
+
+    def clean_sku(self):
+        # the (seller, sku) constraint isn't checked by the form because seller isn't a form field
+        sku = (self.cleaned_data.get('sku') or '').strip() or None
+        seller_id = self.instance.seller_id
+        if sku and seller_id and Product.objects.filter(seller_id=seller_id, sku=sku).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError('You already have a product with this SKU.')
+        return sku
 
     def save(self, seller=None, commit=True):
         product = super().save(commit=False)
@@ -56,5 +65,24 @@ class ProductForm(forms.ModelForm):
             # handle image
             img = self.cleaned_data.get('image')
             if img:
-                ProductImage.objects.create(product=product, image=img)
+                product_image = ProductImage.objects.create(product=product, image=img)
+                # thumbnails are generated by the background worker (see core.tasks)
+                generate_thumbnails.delay(image_id=product_image.pk)
         return product
+
+
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(label='Catalog file (CSV or JSON Lines)')
+    images = forms.FileField(required=False, label='Images (.zip, optional)')
+
+    def clean_file(self):
+        f = self.cleaned_data['file']
+        if not f.name.lower().endswith(('.csv', '.jsonl', '.ndjson', '.json')):
+            raise forms.ValidationError('Upload a .csv or .jsonl file.')
+        return f
+
+    def clean_images(self):
+        f = self.cleaned_data.get('images')
+        if f and not f.name.lower().endswith('.zip'):
+            raise forms.ValidationError('Images must be uploaded as a .zip archive.')
+        return f
@@ -0,0 +1,204 @@
+"""Finding sellers near a buyer.
+
+Every seller with coordinates has a geohash (``User.seller_geohash``, kept in
+sync by a ``pre_save`` signal). A radius search turns its bounding box into a
+handful of geohash cells, reads the sellers in those cells with indexed range
+scans (narrowed further by the bounding box on lat/lng), and computes the
+exact haversine distance only for those candidates. The work depends on how
+many sellers are nearby, not on how many sellers there are.
+
+Product listings get the distance as a SQL expression over the seller's
+coordinates, so sorting by distance orders every product (those of sellers
+without coordinates last) and a radius filter is the same geohash/bounding box
+condition on the joined seller plus ``distance_km <= radius``.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Coalesce, Cos, Least, Power, Radians, Round, Sin, Sqrt
+
+from .delivery import EARTH_RADIUS_KM, distances_km
+from .models import User
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 6  # cells of about 1.2 x 0.6 km
+MAX_CELLS = 16
+MAX_RADIUS_KM = 1000
+UNKNOWN_DISTANCE_KM = 1e6  # sorts after any distance on Earth
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    """Geohash of a point."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    lat, lng = float(lat), float(lng)
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    """``(height, width)`` in degrees of a geohash cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def bounding_box(lat, lng, radius_km):
+    """``(south, west, north, east)`` around a point; west > east when it crosses the antimeridian."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if south == -90.0 or north == 90.0:
+        # the circle reaches a pole: every longitude is in range
+        return south, -180.0, north, 180.0
+    dlng = math.degrees(radius_km / EARTH_RADIUS_KM / math.cos(math.radians(lat)))
+    if dlng >= 180:
+        return south, -180.0, north, 180.0
+    west, east = lng - dlng, lng + dlng
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def _split(box):
+    south, west, north, east = box
+    if west <= east:
+        return [box]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def covering_cells(box, max_cells=MAX_CELLS):
+    """The fewest-prefix set of geohash cells covering ``box`` with at most ``max_cells`` cells."""
+    parts = _split(box)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        spans = []
+        for south, west, north, east in parts:
+            rows = range(int((south + 90) // height), int((min(north, 89.999999) + 90) // height) + 1)
+            cols = range(int((west + 180) // width), int((min(east, 179.999999) + 180) // width) + 1)
+            spans.append((rows, cols))
+        if sum(len(r) * len(c) for r, c in spans) > max_cells:
+            continue
+        cells = set()
+        for rows, cols in spans:
+            for row in rows:
+                for col in cols:
+                    cells.add(encode(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, precision))
+        return cells
+    return {''}
+
+
+def _successor(prefix):
+    # the first geohash that sorts after every hash starting with ``prefix``
+    while prefix and prefix[-1] == BASE32[-1]:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
+
+
+def _cells_q(cells, prefix=''):
+    q = Q()
+    for cell in cells:
+        # a range rather than startswith, so every backend can use the index
+        upper = _successor(cell)
+        cond = Q(**{f'{prefix}seller_geohash__gte': cell})
+        if upper is not None:
+            cond &= Q(**{f'{prefix}seller_geohash__lt': upper})
+        q |= cond
+    return q
+
+
+def near_q(lat, lng, radius_km, prefix=''):
+    """Candidate sellers for a radius search: their geohash cells and bounding box.
+
+    ``prefix`` reaches the seller through a relation, e.g. ``'seller__'`` on products.
+    """
+    box = bounding_box(lat, lng, radius_km)
+    south, west, north, east = box
+    q = _cells_q(covering_cells(box), prefix)
+    q &= Q(**{f'{prefix}seller_lat__gte': south, f'{prefix}seller_lat__lte': north})
+    if west <= east:
+        q &= Q(**{f'{prefix}seller_lng__gte': west, f'{prefix}seller_lng__lte': east})
+    else:
+        q &= Q(**{f'{prefix}seller_lng__gte': west}) | Q(**{f'{prefix}seller_lng__lte': east})
+    return q
+
+
+def distance_expression(lat, lng, prefix=''):
+    """Haversine distance in km from the point to the seller's coordinates, NULL without them."""
+    phi1, lam1 = math.radians(lat), math.radians(lng)
+    phi2 = Radians(Cast(f'{prefix}seller_lat', FloatField()))
+    lam2 = Radians(Cast(f'{prefix}seller_lng', FloatField()))
+    a = Power(Sin((phi2 - phi1) / 2), 2) + math.cos(phi1) * Cos(phi2) * Power(Sin((lam2 - lam1) / 2), 2)
+    # rounding can push ``a`` a hair over 1
+    return Round(2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, 1.0))), 2, output_field=FloatField())
+
+
+def nearby_sellers(lat, lng, radius_km):
+    """``{seller_id: distance_km}`` for sellers within ``radius_km`` of the point."""
+    radius_km = min(float(radius_km), MAX_RADIUS_KM)
+    qs = User.objects.filter(is_seller=True).filter(near_q(lat, lng, radius_km))
+    rows = list(qs.values_list('pk', 'seller_lat', 'seller_lng'))
+    kms = distances_km([(float(s_lat), float(s_lng)) for _, s_lat, s_lng in rows], lat, lng)
+    return {pk: round(km, 2) for (pk, _, _), km in zip(rows, kms) if km <= radius_km}
+
+
+def _float(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def location_params(params):
+    """``(lat, lng, within_km, by_distance)`` from ``lat``/``lng``/``within_km``/``sort=distance`` GET params.
+
+    Returns ``None`` when there is no valid location or nothing location-based was asked for.
+    """
+    lat, lng = _float(params.get('lat')), _float(params.get('lng'))
+    if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    within = _float(params.get('within_km'))
+    within = within if within and within > 0 else None
+    by_distance = params.get('sort') == 'distance'
+    if within is None and not by_distance:
+        return None
+    return lat, lng, within, by_distance
+
+
+def apply_location(qs, params):
+    """Limit products to sellers within ``within_km`` and/or order them nearest first.
+
+    Products get a ``distance_km`` annotation (None when the seller has no
+    coordinates) and ``distance_order``, the same with unknown distances as
+    ``UNKNOWN_DISTANCE_KM`` so they sort last. Only ``within_km`` filters.
+    Returns ``(queryset, applied)``.
+    """
+    location = location_params(params)
+    if location is None:
+        return qs, False
+    lat, lng, within, by_distance = location
+    qs = qs.annotate(distance_km=distance_expression(lat, lng, 'seller__'))
+    if within:
+        within = min(within, MAX_RADIUS_KM)
+        qs = qs.filter(near_q(lat, lng, within, 'seller__'), distance_km__lte=within)
+    if by_distance:
+        qs = qs.annotate(distance_order=Coalesce(F('distance_km'), Value(UNKNOWN_DISTANCE_KM)))
+        qs = qs.order_by('distance_order', '-created_at', '-id')
+    return qs, True
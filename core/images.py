@@ -0,0 +1,51 @@
+"""Thumbnail generation for product images.
+
+Cards are displayed at 180px, so each upload gets a 360x360 (2x) centre-cropped
+JPEG and a WebP copy stored next to the original under ``products/thumbs/``.
+Templates use ``ProductImage.card_url``/``card_webp_url``, which fall back to
+the original until the variants exist.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (360, 360)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def _encode(img, fmt, **options):
+    buf = BytesIO()
+    img.save(buf, fmt, **options)
+    return ContentFile(buf.getvalue())
+
+
+def make_thumbnails(product_image, force=False):
+    """Generate the JPEG and WebP card variants. Returns True if anything was written."""
+    if not product_image.image:
+        return False
+    if product_image.thumbnail and product_image.thumbnail_webp and not force:
+        return False
+    try:
+        with product_image.image.open('rb') as fh:
+            img = Image.open(fh)
+            img = ImageOps.exif_transpose(img)
+            img = ImageOps.fit(img.convert('RGB'), THUMBNAIL_SIZE, Image.LANCZOS)
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Could not read image %s for thumbnailing', product_image.image.name)
+        return False
+
+    stem = os.path.splitext(os.path.basename(product_image.image.name))[0]
+    product_image.thumbnail.save(
+        f'{stem}_thumb.jpg', _encode(img, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True), save=False
+    )
+    product_image.thumbnail_webp.save(
+        f'{stem}_thumb.webp', _encode(img, 'WEBP', quality=WEBP_QUALITY, method=4), save=False
+    )
+    product_image.save(update_fields=['thumbnail', 'thumbnail_webp'])
+    return True
@@ -0,0 +1,241 @@
+"""Per-request performance instrumentation.
+
+``InstrumentationMiddleware`` records, for every request, the number of SQL
+queries, the time spent in the database, the time spent rendering templates
+(including any queries the templates trigger), the total time and the response
+size, tagged with the URL name. Requests over their budget in
+``PERFORMANCE_BUDGETS`` (see ``budget_for``) are logged to
+``core.instrumentation``. The most recent
+samples per URL name are kept in memory for percentiles (``/staff/performance/``;
+each worker process reports its own requests).
+
+For tests, ``assert_within_budget(response)`` fails when the request behind a
+test-client response ran more queries than its view's budget, and
+``query_budget(n)`` does the same for a block of code.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template import base as template_base
+
+from . import prometheus
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_PER_VIEW = 1000
+PERCENTILES = (50, 90, 99)
+# also the keys a budget may limit
+FIELDS = ('ms', 'queries', 'db_ms', 'template_ms', 'bytes')
+
+_current = ContextVar('instrumented_request', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('view', 'method', 'signed_in', 'ms', 'queries', 'db_ms', 'template_ms', 'bytes', 'statements', '_rendering')
+
+    def __init__(self):
+        self.view = None
+        self.method = 'GET'
+        self.signed_in = False
+        self.ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.bytes = None
+        self.statements = []
+        self._rendering = False
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_ms += (time.perf_counter() - start) * 1000
+            metrics.statements.append(sql)
+
+
+def _install_template_timer():
+    # Template.render is also called for {% include %}; only the outermost call is timed
+    original = template_base.Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None or metrics._rendering:
+            return original(self, context)
+        metrics._rendering = True
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_ms += (time.perf_counter() - start) * 1000
+            metrics._rendering = False
+
+    render.instrumented = True
+    template_base.Template.render = render
+
+
+def budget_for(view, method='GET', signed_in=False):
+    """The budget for a request to a URL name.
+
+    ``PERFORMANCE_BUDGETS['default']`` updated with the view's own entry, then
+    with ``'<view>:signed_in'`` for signed-in visitors and ``'<view>:<METHOD>'``
+    for anything but GET/HEAD, when those entries exist.
+    """
+    budgets = getattr(settings, 'PERFORMANCE_BUDGETS', {})
+    names = ['default', view]
+    if signed_in:
+        names.append(f'{view}:signed_in')
+    if method not in ('GET', 'HEAD'):
+        names.append(f'{view}:{method}')
+    budget = {}
+    for name in names:
+        budget.update(budgets.get(name, {}))
+    return budget
+
+
+def exceeded(metrics, budget=None, keys=None):
+    """Descriptions of the limits ``metrics`` broke, e.g. ``['queries 23 > 12']``."""
+    budget = budget_for(metrics.view, metrics.method, metrics.signed_in) if budget is None else budget
+    problems = []
+    for key, limit in budget.items():
+        if key not in FIELDS or (keys is not None and key not in keys):
+            continue
+        value = getattr(metrics, key)
+        if value is not None and value > limit:
+            problems.append(f'{key} {value:.0f} > {limit}' if isinstance(value, float) else f'{key} {value} > {limit}')
+    return problems
+
+
+def _percentile(sorted_values, pct):
+    # nearest rank
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Stats:
+    """The last ``size`` samples per URL name, plus request and over-budget counts."""
+
+    def __init__(self, size=SAMPLES_PER_VIEW):
+        self._lock = threading.Lock()
+        self._size = size
+        self._samples = defaultdict(lambda: deque(maxlen=self._size))
+        self._requests = Counter()
+        self._over_budget = Counter()
+
+    def add(self, metrics, over_budget=False):
+        sample = tuple(getattr(metrics, field) for field in FIELDS)
+        with self._lock:
+            self._samples[metrics.view].append(sample)
+            self._requests[metrics.view] += 1
+            if over_budget:
+                self._over_budget[metrics.view] += 1
+
+    def summary(self, percentiles=PERCENTILES):
+        """``{view: {'requests', 'over_budget', 'budget', <field>: {'p50': ..., ...}}}``, busiest first."""
+        with self._lock:
+            samples = {view: list(rows) for view, rows in self._samples.items()}
+            requests, over_budget = dict(self._requests), dict(self._over_budget)
+        result = {}
+        for view in sorted(samples, key=lambda v: -requests[v]):
+            entry = {'requests': requests[view], 'over_budget': over_budget.get(view, 0), 'budget': budget_for(view)}
+            for index, field in enumerate(FIELDS):
+                values = sorted(row[index] for row in samples[view] if row[index] is not None)
+                entry[field] = {f'p{pct}': _round(_percentile(values, pct)) for pct in percentiles}
+            result[view] = entry
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+            self._over_budget.clear()
+
+
+def _round(value):
+    return round(value, 1) if isinstance(value, float) else value
+
+
+stats = Stats()
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_template_timer()
+
+    def __call__(self, request):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        metrics.view = match.view_name if match is not None else 'unresolved'
+        metrics.method = request.method
+        user = getattr(request, 'user', None)
+        metrics.signed_in = bool(user is not None and user.is_authenticated)
+        if not response.streaming:
+            metrics.bytes = len(response.content)
+        prometheus.observe_request(metrics.view, request.method, response.status_code, metrics.ms / 1000, metrics.queries)
+        problems = exceeded(metrics)
+        stats.add(metrics, over_budget=bool(problems))
+        if problems:
+            logger.warning('%s %s (%s) over budget: %s', request.method, request.path, metrics.view, ', '.join(problems))
+        response.instrumentation = metrics
+        return response
+
+
+# --- test helpers -------------------------------------------------------
+
+def _describe(statements, limit=10):
+    return '\n'.join(f'  {count} x {sql}' for sql, count in Counter(statements).most_common(limit))
+
+
+def assert_within_budget(response, budget=None, include_timing=False):
+    """Fail if the request behind a test-client ``response`` went over its query budget.
+
+    ``budget`` defaults to the view's ``PERFORMANCE_BUDGETS`` entry. Timing
+    limits are skipped unless ``include_timing`` is set, since CI machines vary.
+    """
+    metrics = getattr(response, 'instrumentation', None)
+    if metrics is None:
+        raise AssertionError('Response was not instrumented; is InstrumentationMiddleware installed?')
+    problems = exceeded(metrics, budget, keys=None if include_timing else ('queries', 'bytes'))
+    if problems:
+        raise AssertionError(
+            f'{metrics.view} over budget: {", ".join(problems)}\nMost repeated queries:\n{_describe(metrics.statements)}'
+        )
+
+
+@contextmanager
+def query_budget(limit, using=DEFAULT_DB_ALIAS):
+    """Fail if the block runs more than ``limit`` queries on ``using``."""
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    if len(captured) > limit:
+        statements = [q['sql'] for q in captured.captured_queries]
+        raise AssertionError(f'{len(captured)} queries > budget {limit}\nMost repeated queries:\n{_describe(statements)}')
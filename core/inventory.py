@@ -0,0 +1,186 @@
+"""Bulk price/stock updates for a seller's catalog.
+
+Rows identify a product by ``product_id`` or ``sku`` and carry a new
+``price`` and/or ``stock``. They are validated one by one, resolved against
+the seller's products with one query per chunk and written with one prepared
+``UPDATE`` per column (``executemany``) in one transaction per chunk, so a
+large supplier feed costs a few statements per thousand rows. (``bulk_update``
+builds a CASE expression per row, which is far slower to compile than the
+update itself takes to run.) Bad rows are reported with their row number
+and never stop the rest of the file.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import caching
+from .models import Product
+
+CHUNK_SIZE = 1000
+MAX_PRICE = Decimal('99999999.99')  # Product.price is max_digits=10, decimal_places=2
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_price(value, field='price'):
+    """``value`` as a Decimal rounded to centavos, or ``RowError`` unless it is a finite amount in 0..MAX_PRICE."""
+    try:
+        number = Decimal(str(value))
+        # NaN/sNaN/Infinity parse but can't be compared or stored
+        if not number.is_finite():
+            raise ValueError
+        number = number.quantize(Decimal('0.01'))
+        in_range = 0 <= number <= MAX_PRICE
+    except (ArithmeticError, ValueError):
+        raise RowError(f'invalid {field} {value!r}')
+    if not in_range:
+        raise RowError(f'{field} out of range: {number}')
+    return number
+
+
+def read_rows(data, fmt=None):
+    """Yield row dicts from CSV or JSON ``data`` (text, bytes or a file object).
+
+    JSON may be a list of objects or ``{"rows": [...]}``. Without ``fmt`` the
+    format is guessed from the first non-blank character.
+    """
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt is None:
+        fmt = 'json' if data.lstrip()[:1] in ('[', '{') else 'csv'
+    if fmt == 'json':
+        rows = json.loads(data)
+        if isinstance(rows, dict):
+            rows = rows.get('rows', [])
+        if not isinstance(rows, list):
+            raise ValueError('JSON input must be a list of rows or {"rows": [...]}')
+        yield from rows
+    elif fmt == 'csv':
+        for row in csv.DictReader(io.StringIO(data)):
+            yield {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+    else:
+        raise ValueError(f'Unsupported format {fmt!r}')
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def clean_row(row):
+    """Return ``(product_id, sku, price, stock)`` or raise ``RowError``."""
+    if not isinstance(row, dict):
+        raise RowError('row must be an object')
+    product_id = row.get('product_id')
+    sku = row.get('sku')
+    if _blank(product_id) and _blank(sku):
+        raise RowError('product_id or sku is required')
+    if not _blank(product_id):
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise RowError(f'invalid product_id {product_id!r}')
+    else:
+        product_id = None
+    sku = None if _blank(sku) else str(sku).strip()
+
+    price = row.get('price')
+    price = None if _blank(price) else parse_price(price)
+
+    stock = row.get('stock')
+    if _blank(stock):
+        stock = None
+    else:
+        try:
+            stock = int(stock)
+        except (TypeError, ValueError, ArithmeticError):
+            raise RowError(f'invalid stock {stock!r}')
+        if stock < 0:
+            raise RowError('stock cannot be negative')
+
+    if price is None and stock is None:
+        raise RowError('nothing to update (price and stock are both empty)')
+    return product_id, sku, price, stock
+
+
+def _write(field_name, values):
+    """Set one column for many products with a single prepared UPDATE (``values`` is ``{pk: value}``)."""
+    if not values:
+        return
+    field = Product._meta.get_field(field_name)
+    updated_at = Product._meta.get_field('updated_at')
+    now = updated_at.get_db_prep_save(timezone.now(), connection)
+    qn = connection.ops.quote_name
+    sql = (
+        f'UPDATE {qn(Product._meta.db_table)} SET {qn(field.column)} = %s, {qn(updated_at.column)} = %s '
+        f'WHERE {qn(Product._meta.pk.column)} = %s'
+    )
+    params = [(field.get_db_prep_save(value, connection), now, pk) for pk, value in values.items()]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _apply_chunk(seller, chunk, errors):
+    """Write one chunk of ``(row_number, product_id, sku, price, stock)``; return the number of rows applied."""
+    ids = {c[1] for c in chunk if c[1] is not None}
+    skus = {c[2] for c in chunk if c[1] is None}
+    known_ids, by_sku = set(), {}
+    for pk, sku in Product.objects.filter(seller=seller).filter(Q(pk__in=ids) | Q(sku__in=skus)).values_list('pk', 'sku'):
+        known_ids.add(pk)
+        if sku:
+            by_sku[sku] = pk
+
+    prices, stocks, applied = {}, {}, 0
+    for row_number, product_id, sku, price, stock in chunk:
+        if product_id is not None:
+            pk = product_id if product_id in known_ids else None
+        else:
+            pk = by_sku.get(sku)
+        if pk is None:
+            errors.append({'row': row_number, 'error': f'unknown product {product_id if product_id is not None else sku!r}'})
+            continue
+        # price and stock are written separately so a price-only row never rewrites stock
+        if price is not None:
+            prices[pk] = price
+        if stock is not None:
+            stocks[pk] = stock
+        applied += 1
+
+    with transaction.atomic():
+        _write('price', prices)
+        _write('stock', stocks)
+    return applied
+
+
+def apply_updates(seller, rows, chunk_size=CHUNK_SIZE):
+    """Apply ``rows`` to ``seller``'s products.
+
+    Returns ``{'updated': n, 'errors': [{'row': n, 'error': msg}, ...]}`` with
+    rows numbered from 1. A later row for the same product wins.
+    """
+    errors = []
+    updated = 0
+    chunk = []
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            chunk.append((row_number, *clean_row(row)))
+        except RowError as exc:
+            errors.append({'row': row_number, 'error': str(exc)})
+        if len(chunk) >= chunk_size:
+            updated += _apply_chunk(seller, chunk, errors)
+            chunk = []
+    if chunk:
+        updated += _apply_chunk(seller, chunk, errors)
+    if updated:
+        # no post_save signals fire for these writes, so invalidate the storefront cache here
+        caching.invalidate_seller_store(seller.pk)
+    errors.sort(key=lambda e: e['row'])
+    return {'updated': updated, 'errors': errors}
@@ -0,0 +1,86 @@
+"""Per-seller sales ledger.
+
+Keeps ``SellerSales.total`` equal to the value of each seller's line items
+(quantity * price + delivery fee) on delivered orders, so the sidebar can read
+a single row instead of scanning order history.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from .models import OrderItem, SellerSales
+
+DELIVERED = 'delivered'
+
+LINE_AMOUNT = ExpressionWrapper(
+    F('quantity') * F('price') + F('delivery_fee'),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def _add(seller_id, amount):
+    if not amount:
+        return
+    updated = SellerSales.objects.filter(seller_id=seller_id).update(total=F('total') + amount)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            SellerSales.objects.create(seller_id=seller_id, total=amount)
+    except IntegrityError:
+        # another request created the row first
+        SellerSales.objects.filter(seller_id=seller_id).update(total=F('total') + amount)
+
+
+def _seller_amounts(items_qs):
+    rows = (
+        items_qs.filter(product__isnull=False)
+        .values('product__seller_id')
+        .annotate(amount=Sum(LINE_AMOUNT))
+    )
+    return {r['product__seller_id']: r['amount'] or Decimal('0') for r in rows}
+
+
+def _line_amount(item):
+    return Decimal(item.quantity) * Decimal(str(item.price)) + Decimal(str(item.delivery_fee or 0))
+
+
+def item_added(item):
+    """Credit the seller when an item is added to an already delivered order."""
+    if item.product_id is None or item.order.status != DELIVERED:
+        return
+    _add(item.product.seller_id, _line_amount(item))
+
+
+def item_removed(item, order_status):
+    """Debit the seller when an item of a delivered order is deleted."""
+    if item.product_id is None or order_status != DELIVERED:
+        return
+    _add(item.product.seller_id, -_line_amount(item))
+
+
+def order_status_changed(order, old_status):
+    """Move the order's line amounts in or out of the ledger on delivery transitions."""
+    new_status = order.status
+    if old_status == new_status or DELIVERED not in (old_status, new_status):
+        return
+    sign = 1 if new_status == DELIVERED else -1
+    for seller_id, amount in _seller_amounts(OrderItem.objects.filter(order=order)).items():
+        _add(seller_id, sign * amount)
+
+
+def seller_total(seller):
+    total = SellerSales.objects.filter(seller=seller).values_list('total', flat=True).first()
+    return total or Decimal('0.00')
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every seller's total from delivered orders. Returns the number of ledger rows."""
+    amounts = _seller_amounts(OrderItem.objects.filter(order__status=DELIVERED))
+    SellerSales.objects.all().delete()
+    SellerSales.objects.bulk_create(
+        [SellerSales(seller_id=seller_id, total=amount) for seller_id, amount in amounts.items()]
+    )
+    return len(amounts)
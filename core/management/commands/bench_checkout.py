@@ -0,0 +1,82 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.crypto import get_random_string
+
+from core.checkout import OutOfStock, place_order
+from core.models import Order, Product, Task, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent checkouts against a single SKU and verify no overselling. '
+        'Creates a throwaway seller, buyers and product, and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=50, help='Number of concurrent buyer threads.')
+        parser.add_argument('--orders-per-buyer', type=int, default=4)
+        parser.add_argument('--stock', type=int, default=100, help='Initial stock of the contested product.')
+        parser.add_argument('--quantity', type=int, default=1, help='Units bought per order.')
+
+    def handle(self, *args, **options):
+        tag = f'bench_{get_random_string(6).lower()}'
+        seller = User.objects.create(username=f'{tag}_seller', is_seller=True)
+        buyers = [User(username=f'{tag}_buyer{i}') for i in range(options['buyers'])]
+        User.objects.bulk_create(buyers)
+        buyers = list(User.objects.filter(username__startswith=f'{tag}_buyer'))
+        product = Product.objects.create(seller=seller, name=f'{tag} cement', price=Decimal('250.00'), stock=options['stock'])
+
+        results = {'ok': 0, 'out_of_stock': 0, 'errors': 0}
+        lock = threading.Lock()
+        start_gate = threading.Event()
+
+        def buyer_thread(buyer):
+            start_gate.wait()
+            item = {'product': product, 'quantity': options['quantity'], 'unit_price': product.price}
+            for _ in range(options['orders_per_buyer']):
+                try:
+                    place_order(buyer, [item], address='bench')
+                    outcome = 'ok'
+                except OutOfStock:
+                    outcome = 'out_of_stock'
+                except Exception as exc:
+                    self.stderr.write(f'{buyer.username}: {exc!r}')
+                    outcome = 'errors'
+                with lock:
+                    results[outcome] += 1
+            connections.close_all()
+
+        threads = [threading.Thread(target=buyer_thread, args=(b,)) for b in buyers]
+        for t in threads:
+            t.start()
+        started = time.perf_counter()
+        start_gate.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            product.refresh_from_db()
+            sold = options['stock'] - product.stock
+            orders = Order.objects.filter(buyer__in=buyers).count()
+            attempts = sum(results.values())
+            self.stdout.write(
+                f"{attempts} checkouts by {len(buyers)} threads in {elapsed:.2f}s "
+                f"({attempts / elapsed:.1f}/s): {results['ok']} placed, "
+                f"{results['out_of_stock']} out of stock, {results['errors']} errors"
+            )
+            self.stdout.write(f'stock {options["stock"]} -> {product.stock}, {orders} orders written')
+            expected_sold = results['ok'] * options['quantity']
+            if product.stock < 0 or sold != expected_sold or orders != results['ok']:
+                raise CommandError(f'Inconsistent result: sold {sold}, expected {expected_sold}, orders {orders}')
+            self.stdout.write(self.style.SUCCESS('No overselling detected.'))
+        finally:
+            order_ids = list(Order.objects.filter(buyer__in=buyers).values_list('pk', flat=True))
+            Task.objects.filter(name='notify_order_placed', payload__order_id__in=order_ids).delete()
+            Order.objects.filter(pk__in=order_ids).delete()
+            product.delete()
+            User.objects.filter(username__startswith=tag).delete()
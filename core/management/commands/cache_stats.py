@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import caching
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit/miss counts per cache (page, product cards, categories, seller store).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them.')
+
+    def handle(self, *args, **options):
+        for name, row in caching.stats().items():
+            rate = f'{row["hit_rate"]:.1%}' if row['hit_rate'] is not None else '-'
+            self.stdout.write(f'{name:<14} hits {row["hits"]:>8}  misses {row["misses"]:>8}  hit rate {rate}')
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core import metrics
+from core.models import Order, OrderItem, Product, User
+
+SAMPLE_ID = 1  # any id works; only the plan is inspected
+
+
+def hot_queries():
+    """``(label, queryset, index)`` for each hot access path and the index it should use."""
+    return [
+        ('buyer order history',
+         Order.objects.filter(buyer_id=SAMPLE_ID).order_by('-created_at', '-pk')[:20],
+         'order_buyer_created_idx'),
+        ('buyer orders by status',
+         Order.objects.filter(buyer_id=SAMPLE_ID, status='pending').order_by('-created_at', '-pk')[:20],
+         'order_buyer_status_created_idx'),
+        ('orders by status and date',
+         metrics.orders(start=date(2000, 1, 1), end=date(2000, 12, 31), statuses=['pending']).order_by('created_at'),
+         'order_status_created_idx'),
+        ('status counts',
+         Order.objects.values('status').annotate(n=Count('id')).order_by(),
+         'order_status_created_idx'),
+        ('home page listing',
+         Product.objects.order_by('-created_at')[:24],
+         'product_created_idx'),
+        ('seller storefront page',
+         Product.objects.filter(seller_id=SAMPLE_ID).order_by('-created_at', '-pk')[:24],
+         'product_seller_created_idx'),
+        ('category by price',
+         Product.objects.filter(category_id=SAMPLE_ID, price__gte=0).order_by('price'),
+         'product_category_price_idx'),
+        ('seller orders',
+         OrderItem.objects.filter(product__seller_id=SAMPLE_ID).values('order_id').distinct(),
+         'orderitem_product_order_idx'),
+        ('nearby sellers',
+         User.objects.filter(seller_geohash__gte='wdw4', seller_geohash__lt='wdw5'),
+         'user_seller_geohash_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot marketplace queries and fail if any of them does not use its index.'
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # tiny dev tables make a sequential scan look cheaper; we only care that the index is usable
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for label, qs, index in hot_queries():
+                plan = qs.explain()
+                if index in plan:
+                    self.stdout.write(f'ok    {label}: {index}')
+                else:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'FAIL  {label}: expected {index}'))
+                if options['verbosity'] > 1 or index not in plan:
+                    self.stdout.write('      ' + plan.replace('\n', '\n      '))
+        if failures:
+            raise CommandError(f'{len(failures)} hot query(ies) not using their index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot queries use their indexes.'))
@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core import exports
+from core.management.users import user_by_ref
+from core.models import Order
+
+
+def _date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Stream order items (with fees) as CSV or JSON Lines, optionally filtered by date, status and seller.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--start', type=_date, help='First order date (YYYY-MM-DD), inclusive.')
+        parser.add_argument('--end', type=_date, help='Last order date (YYYY-MM-DD), inclusive.')
+        parser.add_argument('--status', action='append', choices=[key for key, _ in Order.ORDER_STATUS],
+                            help='Repeat to include several statuses.')
+        parser.add_argument('--seller', help='Only this seller\'s lines (username or id).')
+        parser.add_argument('--output', '-o', help='Write to this file instead of stdout.')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        seller = None
+        if options['seller']:
+            seller = user_by_ref(options['seller'], sellers_only=False)
+        rows = exports.export_rows(
+            start=options['start'], end=options['end'], statuses=options['status'],
+            seller=seller, chunk_size=options['chunk_size'],
+        )
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        count = -1 if options['format'] == 'csv' else 0  # don't count the CSV header
+        try:
+            for line in exports.stream(options['format'], rows):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f'Wrote {count} row(s) to {options["output"]}'))
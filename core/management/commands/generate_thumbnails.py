@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.images import make_thumbnails
+from core.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Generate card thumbnails (JPEG + WebP) for product images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate existing thumbnails too.')
+
+    def handle(self, *args, **options):
+        qs = ProductImage.objects.order_by('pk')
+        if not options['force']:
+            qs = qs.filter(Q(thumbnail='') | Q(thumbnail_webp=''))
+        done = skipped = 0
+        for product_image in qs.iterator(chunk_size=200):
+            if make_thumbnails(product_image, force=options['force']):
+                done += 1
+            else:
+                skipped += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated thumbnails for {done} image(s), skipped {skipped}.'))
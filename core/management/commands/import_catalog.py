@@ -0,0 +1,50 @@
+import csv
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalog_import
+from core.management.users import user_by_ref
+
+
+class Command(BaseCommand):
+    help = 'Import a seller\'s products from a CSV or JSON Lines file, with images from a directory or zip.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--seller', required=True, help='Seller username or id.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--images', help='Directory or .zip containing the files named in the image column.')
+        parser.add_argument('--batch-size', type=int, default=catalog_import.BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=50, help='How many row errors to print.')
+
+    def handle(self, *args, **options):
+        seller = user_by_ref(options['seller'])
+        fmt = options['format'] or catalog_import.guess_format(options['path'])
+
+        def progress(stats):
+            self.stdout.write(f'{stats["rows"]} row(s) read, {stats["created"]} created, {stats["error_count"]} error(s)')
+
+        try:
+            images = catalog_import.ImageSource(options['images'])
+        except (OSError, zipfile.BadZipFile) as exc:
+            raise CommandError(f'Could not open images {options["images"]}: {exc}')
+        try:
+            with open(options['path'], 'rb') as fh:
+                stats = catalog_import.import_catalog(
+                    seller, fh, fmt, images=images, batch_size=options['batch_size'], progress=progress
+                )
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+        finally:
+            images.close()
+
+        for error in stats['errors'][:options['max_errors']]:
+            self.stderr.write(f'row {error["row"]}: {error["error"]}')
+        hidden = stats['error_count'] - min(len(stats['errors']), options['max_errors'])
+        if hidden > 0:
+            self.stderr.write(f'... and {hidden} more error(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["created"]} product(s) and {stats["images"]} image(s) for {seller.username} '
+            f'from {stats["rows"]} row(s), {stats["error_count"]} error(s).'
+        ))
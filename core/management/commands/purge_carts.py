@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import carts
+
+
+class Command(BaseCommand):
+    help = 'Delete carts that have not been touched for a number of days (anonymous carts only by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--include-users', action='store_true', help='Also delete signed-in users\' stale carts.')
+        parser.add_argument('--batch-size', type=int, default=carts.PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = carts.purge_abandoned(
+            days=options['days'], include_users=options['include_users'], batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} abandoned cart(s).'))
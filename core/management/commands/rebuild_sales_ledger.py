@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import ledger
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-seller sales ledger from delivered orders.'
+
+    def handle(self, *args, **options):
+        count = ledger.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales ledger for {count} seller(s).'))
@@ -0,0 +1,28 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run the background task worker (thumbnails, notification emails, reindexing).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of worker threads.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Run the currently due tasks and exit.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *a: stop.set())
+        self.stdout.write(f"Worker started with {options['concurrency']} thread(s).")
+        tasks.run_worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            stop_event=stop,
+        )
+        self.stdout.write('Worker stopped.')
@@ -0,0 +1,37 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import inventory
+from core.management.users import user_by_ref
+
+
+class Command(BaseCommand):
+    help = 'Bulk-update price/stock of a seller\'s products from a CSV or JSON file of (product_id or sku, price, stock).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--seller', required=True, help='Seller username or id.')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=inventory.CHUNK_SIZE)
+        parser.add_argument('--max-errors', type=int, default=50, help='How many row errors to print.')
+
+    def handle(self, *args, **options):
+        seller = user_by_ref(options['seller'])
+        fmt = options['format']
+        if fmt is None and options['path'].lower().endswith(('.csv', '.json')):
+            fmt = options['path'].rsplit('.', 1)[1].lower()
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = inventory.apply_updates(seller, inventory.read_rows(fh, fmt), chunk_size=options['chunk_size'])
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+
+        for error in result['errors'][:options['max_errors']]:
+            self.stderr.write(f'row {error["row"]}: {error["error"]}')
+        hidden = len(result['errors']) - options['max_errors']
+        if hidden > 0:
+            self.stderr.write(f'... and {hidden} more error(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {result["updated"]} row(s) for {seller.username}, {len(result["errors"])} error(s).'
+        ))
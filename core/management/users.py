@@ -0,0 +1,14 @@
+"""Helpers shared by the management commands."""
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+
+
+def user_by_ref(ref, sellers_only=True):
+    """The user whose id or username is ``ref`` (only sellers unless ``sellers_only`` is false)."""
+    filters = {'pk': int(ref)} if ref.isdigit() else {'username': ref}
+    if sellers_only:
+        filters['is_seller'] = True
+    user = get_user_model().objects.filter(**filters).first()
+    if user is None:
+        raise CommandError(f'No {"seller" if sellers_only else "user"} {ref!r}')
+    return user
@@ -0,0 +1,118 @@
+"""Marketplace revenue metrics computed with database aggregation.
+
+Every function takes optional ``start``/``end`` dates (inclusive, on
+``Order.created_at``) and returns plain values, so the cost depends on the
+size of the result rather than the number of orders.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .ledger import LINE_AMOUNT
+from .models import Order, OrderItem
+
+PERIODS = {'day': TruncDate, 'week': TruncWeek}
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _date_filter(prefix, start, end):
+    # plain datetime bounds rather than created_at__date, so the (status, created_at) index covers the range
+    filters = {}
+    if start:
+        filters[f'{prefix}created_at__gte'] = _start_of_day(start)
+    if end:
+        filters[f'{prefix}created_at__lt'] = _start_of_day(end + timedelta(days=1))
+    return filters
+
+
+def orders(start=None, end=None, statuses=None):
+    qs = Order.objects.filter(**_date_filter('', start, end))
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+    return qs
+
+
+def order_items(start=None, end=None, statuses=None):
+    qs = OrderItem.objects.filter(**_date_filter('order__', start, end))
+    if statuses:
+        qs = qs.filter(order__status__in=statuses)
+    return qs
+
+
+def total_sales(start=None, end=None, statuses=None):
+    """Sum of the stored grand totals (items + delivery fees) of the matching orders."""
+    total = orders(start, end, statuses).aggregate(total=Sum('grand_total'))['total']
+    return total or Decimal('0.00')
+
+
+def status_counts(start=None, end=None):
+    counts = {key: 0 for key, _ in Order.ORDER_STATUS}
+    for row in orders(start, end).values('status').annotate(n=Count('id')).order_by():
+        counts[row['status']] = row['n']
+    return counts
+
+
+def sales_by_period(period='day', start=None, end=None, statuses=None):
+    """List of ``{'period', 'orders', 'sales'}`` rows, oldest first."""
+    trunc = PERIODS[period]
+    rows = (
+        orders(start, end, statuses)
+        .annotate(period=trunc('created_at'))
+        .values('period')
+        .annotate(orders=Count('id'), sales=Sum('grand_total'))
+        .order_by('period')
+    )
+    return list(rows)
+
+
+def top_sellers(limit=5, start=None, end=None, statuses=None):
+    rows = (
+        order_items(start, end, statuses)
+        .filter(product__isnull=False)
+        .values('product__seller_id', 'product__seller__username')
+        .annotate(sales=Sum(LINE_AMOUNT), units=Sum('quantity'))
+        .order_by('-sales')[:limit]
+    )
+    return [
+        {'seller_id': r['product__seller_id'], 'username': r['product__seller__username'], 'sales': r['sales'], 'units': r['units']}
+        for r in rows
+    ]
+
+
+def top_categories(limit=5, start=None, end=None, statuses=None):
+    rows = (
+        order_items(start, end, statuses)
+        .filter(product__category__isnull=False)
+        .values('product__category_id', 'product__category__name')
+        .annotate(sales=Sum(LINE_AMOUNT), units=Sum('quantity'))
+        .order_by('-sales')[:limit]
+    )
+    return [
+        {'category_id': r['product__category_id'], 'name': r['product__category__name'], 'sales': r['sales'], 'units': r['units']}
+        for r in rows
+    ]
+
+
+def dashboard(start=None, end=None, period='day'):
+    """Everything the admin dashboard shows, in a handful of aggregate queries."""
+    if start is None and end is None:
+        # keep the time series bounded when no range is requested
+        series_start = Order.objects.order_by('-created_at').values_list('created_at', flat=True).first()
+        series_start = (series_start.date() - timedelta(days=13 if period == 'day' else 7 * 11)) if series_start else None
+    else:
+        series_start = start
+    counts = status_counts(start, end)
+    return {
+        'total_sales': total_sales(start, end),
+        'total_orders': sum(counts.values()),
+        'status_counts': counts,
+        'sales_by_period': sales_by_period(period, series_start, end),
+        'top_sellers': top_sellers(start=start, end=end),
+        'top_categories': top_categories(start=start, end=end),
+    }
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def build_ledger(apps, schema_editor):
+    OrderItem = apps.get_model('core', 'OrderItem')
+    SellerSales = apps.get_model('core', 'SellerSales')
+    amount = ExpressionWrapper(F('quantity') * F('price') + F('delivery_fee'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    rows = (
+        OrderItem.objects.filter(order__status='delivered', product__isnull=False)
+        .values('product__seller_id')
+        .annotate(amount=Sum(amount))
+    )
+    SellerSales.objects.bulk_create(
+        [SellerSales(seller_id=r['product__seller_id'], total=r['amount'] or 0) for r in rows]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_orderitem_delivery_fee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerSales',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_ledger', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
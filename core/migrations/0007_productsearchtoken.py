@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:19
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of the tokenizer as it was when this migration was written
+# (core.search may change; rebuild_search_index reindexes with the current one).
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKEN_LENGTH = 64
+FIELD_WEIGHTS = (
+    ('name', 3),
+    ('brand', 2),
+    ('category', 2),
+    ('description', 1),
+)
+
+
+def tokenize(text):
+    tokens = []
+    for tok in TOKEN_RE.findall((text or '').lower()):
+        if len(tok) < 2 and not tok.isdigit():
+            continue
+        tokens.append(tok[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def build_tokens(name='', brand='', category='', description=''):
+    values = {'name': name, 'brand': brand, 'category': category, 'description': description}
+    weights = {}
+    for field, weight in FIELD_WEIGHTS:
+        for tok in tokenize(values[field]):
+            if weights.get(tok, 0) < weight:
+                weights[tok] = weight
+    return weights
+
+
+def build_index(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductSearchToken = apps.get_model('core', 'ProductSearchToken')
+    # written in batches so a large catalog's tokens are never all in memory at once
+    rows = []
+    for p in Product.objects.select_related('category').iterator(chunk_size=1000):
+        category = p.category.name if p.category_id else ''
+        for token, weight in build_tokens(p.name, p.brand, category, p.description).items():
+            rows.append(ProductSearchToken(product_id=p.pk, token=token, weight=weight))
+        if len(rows) >= 5000:
+            ProductSearchToken.objects.bulk_create(rows)
+            rows = []
+    ProductSearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sellersales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='core.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'product'], name='search_token_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'token'), name='unique_product_token')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_productsearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='products/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, upload_to='products/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:25
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def seed_tiers(apps, schema_editor):
+    # the bulk discount previously hardcoded in the cart/checkout views
+    DiscountTier = apps.get_model('core', 'DiscountTier')
+    DiscountTier.objects.bulk_create([
+        DiscountTier(min_quantity=5, percent=Decimal('5.00'), sellers_only=True),
+        DiscountTier(min_quantity=10, percent=Decimal('10.00'), sellers_only=True),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscountTier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_quantity', models.PositiveIntegerField(unique=True)),
+                ('percent', models.DecimalField(decimal_places=2, help_text='Discount in percent, e.g. 5 for 5%', max_digits=5)),
+                ('sellers_only', models.BooleanField(default=True, help_text="Only for sellers buying another seller's products")),
+                ('active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['min_quantity'],
+            },
+        ),
+        migrations.RunPython(seed_tiers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:28
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def backfill_totals(apps, schema_editor):
+    # same figures the old Order.total property produced: items plus per-item delivery fees
+    Order = apps.get_model('core', 'Order')
+    OrderItem = apps.get_model('core', 'OrderItem')
+    line = ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    rows = OrderItem.objects.values('order_id').annotate(subtotal=Sum(line), fees=Sum('delivery_fee')).order_by()
+    batch = []
+    for r in rows.iterator(chunk_size=1000):
+        subtotal = r['subtotal'] or Decimal('0.00')
+        batch.append(Order(pk=r['order_id'], items_subtotal=subtotal, grand_total=subtotal + (r['fees'] or 0)))
+        if len(batch) >= 1000:
+            Order.objects.bulk_update(batch, ['items_subtotal', 'grand_total'])
+            batch = []
+    Order.objects.bulk_update(batch, ['items_subtotal', 'grand_total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_discounttier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='grand_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
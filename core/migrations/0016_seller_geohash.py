@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+# A frozen copy of core.geo.encode as it was when this migration was written.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 6
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    lat, lng = float(lat), float(lng)
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    located = User.objects.filter(seller_lat__isnull=False, seller_lng__isnull=False)
+    batch = []
+    for pk, lat, lng in located.values_list('pk', 'seller_lat', 'seller_lng').iterator(chunk_size=1000):
+        batch.append(User(pk=pk, seller_geohash=encode(lat, lng)))
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ['seller_geohash'])
+            batch = []
+    User.objects.bulk_update(batch, ['seller_geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0015_carts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='seller_geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['seller_geohash'], name='user_seller_geohash_idx'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 
@@ -10,15 +13,34 @@ class User(AbstractUser):
     default_address = models.TextField(blank=True)
     seller_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     seller_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # geohash of seller_lat/seller_lng, set on save (see core.geo); empty without coordinates
+    seller_geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
+
+    class Meta(AbstractUser.Meta):
+        # nearby-seller searches scan geohash ranges (core.geo)
+        indexes = [models.Index(fields=['seller_geohash'], name='user_seller_geohash_idx')]
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_images(self):
+        """Prefetch images into ``listing_images`` (read by ``Product.primary_image``)."""
+        return self.prefetch_related(
+            models.Prefetch('images', queryset=ProductImage.objects.order_by('pk'), to_attr='listing_images')
+        )
+
+    def for_listing(self):
+        """Load seller, category and images in bulk so cards don't query per product."""
+        return self.select_related('seller', 'category').with_images()
+
+
 class Product(models.Model):
     seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='products')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
@@ -28,7 +50,25 @@ class Product(models.Model):
     unit = models.CharField(max_length=50, default='pcs')
     stock = models.PositiveIntegerField(default=0)
     brand = models.CharField(max_length=100, blank=True)
+    # seller's own stock-keeping code, used by bulk inventory updates (see core.inventory)
+    sku = models.CharField(max_length=64, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped by queryset updates that skip save() (checkout stock, bulk inventory, image and seller changes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # newest-first listings (home page) and keyset-paged storefronts
+            models.Index(fields=['-created_at'], name='product_created_idx'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='product_seller_created_idx'),
+            # category pages filtered/sorted by price
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            # Max(updated_at) for the catalog's conditional-GET validator
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
+        constraints = [models.UniqueConstraint(fields=['seller', 'sku'], name='unique_seller_sku')]
 
     def __str__(self):
         return self.name
@@ -37,10 +77,53 @@ class Product(models.Model):
     def is_available(self):
         return self.stock > 0
 
+    @property
+    def primary_image(self):
+        # uses the images prefetched by for_listing() when available
+        if hasattr(self, 'listing_images'):
+            return self.listing_images[0] if self.listing_images else None
+        return self.images.order_by('pk').first()
+
+
+class DiscountTier(models.Model):
+    # bulk discount for a cart line once its quantity reaches min_quantity (see core.pricing)
+    min_quantity = models.PositiveIntegerField(unique=True)
+    percent = models.DecimalField(max_digits=5, decimal_places=2, help_text='Discount in percent, e.g. 5 for 5%')
+    sellers_only = models.BooleanField(default=True, help_text="Only for sellers buying another seller's products")
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['min_quantity']
+
+    def __str__(self):
+        return f'{self.min_quantity}+ : {self.percent}%'
+
+
+class ProductSearchToken(models.Model):
+    # inverted index over product text, maintained by core.search
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [models.Index(fields=['token', 'product'], name='search_token_idx')]
+        constraints = [models.UniqueConstraint(fields=['product', 'token'], name='unique_product_token')]
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
+    # fixed-size card variants generated by core.images
+    thumbnail = models.ImageField(upload_to='products/thumbs/', blank=True)
+    thumbnail_webp = models.ImageField(upload_to='products/thumbs/', blank=True)
+
+    @property
+    def card_url(self):
+        return self.thumbnail.url if self.thumbnail else self.image.url
+
+    @property
+    def card_webp_url(self):
+        return self.thumbnail_webp.url if self.thumbnail_webp else ''
 
 
 class Order(models.Model):
@@ -59,6 +142,18 @@ class Order(models.Model):
     delivery_fee = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     delivery_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     delivery_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # written by checkout alongside the items; refresh_totals() recomputes them after item edits
+    items_subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    grand_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # buyer order history, keyset-paged newest first, optionally filtered by status
+            models.Index(fields=['buyer', '-created_at', '-id'], name='order_buyer_created_idx'),
+            models.Index(fields=['buyer', 'status', '-created_at', '-id'], name='order_buyer_status_created_idx'),
+            # status counts and date-bounded reports
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.order_number:
@@ -67,10 +162,20 @@ class Order(models.Model):
 
     @property
     def total(self):
-        # total of items plus any per-item delivery fees (order.delivery_fee mirrors the sum)
-        items_total = sum(item.total_price for item in self.items.all())
-        fees_total = sum(float(getattr(item, 'delivery_fee', 0)) for item in self.items.all())
-        return items_total + fees_total
+        return self.grand_total
+
+    def refresh_totals(self):
+        """Recompute the stored totals from the order's items in one aggregate query."""
+        sums = self.items.aggregate(
+            subtotal=models.Sum(models.F('quantity') * models.F('price'), output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+            fees=models.Sum('delivery_fee'),
+        )
+        self.items_subtotal = sums['subtotal'] or Decimal('0.00')
+        self.delivery_fee = sums['fees'] or Decimal('0.00')
+        self.grand_total = self.items_subtotal + self.delivery_fee
+        Order.objects.filter(pk=self.pk).update(
+            items_subtotal=self.items_subtotal, delivery_fee=self.delivery_fee, grand_total=self.grand_total
+        )
 
 
 class OrderItem(models.Model):
@@ -80,10 +185,73 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     delivery_fee = models.DecimalField(max_digits=8, decimal_places=2, default=0)
 
+    class Meta:
+        # seller-side lookups go product -> order item -> order
+        indexes = [models.Index(fields=['product', 'order'], name='orderitem_product_order_idx')]
+
     @property
     def total_price(self):
-        return self.quantity * float(self.price)
+        return self.quantity * self.price
     
     @property
     def total_with_fee(self):
-        return self.total_price + float(self.delivery_fee)
+        return self.total_price + self.delivery_fee
+
+
+class Cart(models.Model):
+    # a visitor's cart; anonymous carts are found through the session's cart_id (see core.carts)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='cart')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Cart {self.pk} ({self.user or "anonymous"})'
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product')]
+        # purge_carts looks for carts whose newest item is old
+        indexes = [models.Index(fields=['cart', 'updated_at'], name='cartitem_cart_updated_idx')]
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_id}'
+
+
+class SellerSales(models.Model):
+    # running total of delivered sales per seller, maintained by core.ledger
+    seller = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='sales_ledger')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.seller} - {self.total}'
+
+
+class Task(models.Model):
+    # background job row, executed by the worker in core.tasks
+    STATUS = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx')]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
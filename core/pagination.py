@@ -0,0 +1,45 @@
+"""Keyset (cursor) pagination on ``(created_at, id)``.
+
+Unlike OFFSET pagination the cost of a page does not grow with how deep the
+reader has paged: each page is an index range scan starting after the last
+row of the previous one.
+"""
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, pk)`` or ``None`` for a missing or malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(stamp)
+        return (created_at, int(pk)) if created_at else None
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_page(qs, cursor=None, page_size=24):
+    """Return ``(rows, next_cursor)`` for the newest-first page after ``cursor``."""
+    position = decode_cursor(cursor)
+    qs = qs.order_by('-created_at', '-pk')
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.pk)
+    return rows, next_cursor
@@ -0,0 +1,66 @@
+"""Cart pricing with database-configured bulk discount tiers.
+
+``price_lines`` prices a whole cart in one pass: tiers are loaded once per
+call and eligibility is decided from ``product.seller_id`` so no seller rows
+are fetched. Amounts are Decimals quantized to centavos.
+"""
+from decimal import Decimal
+
+from .models import DiscountTier
+
+CENT = Decimal('0.01')
+
+
+def load_tiers():
+    """Active tiers, highest threshold first."""
+    return list(DiscountTier.objects.filter(active=True).order_by('-min_quantity'))
+
+
+def discount_for(quantity, tiers, seller_discounts):
+    """Fractional discount (e.g. Decimal('0.05')) for a line of ``quantity`` units."""
+    for tier in tiers:
+        if quantity >= tier.min_quantity and (seller_discounts or not tier.sellers_only):
+            return tier.percent / Decimal('100')
+    return Decimal('0')
+
+
+def price_lines(user, lines, tiers=None):
+    """Price ``lines`` (``(product, quantity)`` pairs) for ``user``.
+
+    Returns ``(items, subtotal)`` where each item is a dict with ``product``,
+    ``quantity``, ``unit_price``, ``total_price`` and ``discount_pct``.
+    """
+    if tiers is None:
+        tiers = load_tiers()
+    buyer_is_seller = bool(getattr(user, 'is_authenticated', False) and getattr(user, 'is_seller', False))
+    items = []
+    subtotal = Decimal('0.00')
+    for product, quantity in lines:
+        # sellers restocking from another seller get the seller-only tiers
+        seller_discounts = buyer_is_seller and product.seller_id != user.pk
+        discount_pct = discount_for(quantity, tiers, seller_discounts)
+        unit_price = (product.price * (Decimal('1') - discount_pct)).quantize(CENT)
+        total_price = (unit_price * quantity).quantize(CENT)
+        subtotal += total_price
+        items.append({
+            'product': product,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': total_price,
+            'discount_pct': discount_pct,
+        })
+    return items, subtotal
+
+
+def tier_prices(product, tiers=None):
+    """Discounted unit price of ``product`` at each tier, lowest threshold first."""
+    if tiers is None:
+        tiers = load_tiers()
+    return [
+        {
+            'min_quantity': tier.min_quantity,
+            'percent': tier.percent,
+            'unit_price': (product.price * (Decimal('1') - tier.percent / Decimal('100'))).quantize(CENT),
+        }
+        for tier in sorted(tiers, key=lambda t: t.min_quantity)
+    ]
@@ -0,0 +1,293 @@
+"""Prometheus metrics, served at ``/metrics`` in the text exposition format.
+
+Each worker process keeps its counters and histograms in memory. With
+``METRICS_DIR`` set, a background thread writes them once a second
+(``FLUSH_INTERVAL``) to a file of its own in that directory, replacing it
+atomically, and ``/metrics`` adds up every file there, so all the processes on
+a host are reported together without them ever writing the same file. Like
+prometheus_client's multiprocess mode, the first write of a process deletes the
+files of processes that are no longer running; Prometheus treats the drop as a
+counter reset. Without ``METRICS_DIR`` each process reports only itself.
+"""
+import atexit
+import bisect
+import hmac
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = {}
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # running as another user, or a platform without signal 0: leave the file alone
+        return True
+    return True
+
+
+def remove_dead_files(directory):
+    """Delete the files of processes that are no longer running; returns how many."""
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return removed
+    for entry in entries:
+        pid = entry.name.split('-', 1)[0]
+        if not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+            continue
+        try:
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+class _ProcessStore:
+    """This process's values, ``{(metric name, label values): value}``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        # first update in this process (or in a child forked after the parent recorded something)
+        self._pid = os.getpid()
+        self._values = {}
+        self._dirty = False
+        self._name = f'{self._pid}-{uuid.uuid4().hex[:8]}.json'
+        self._written = None
+        threading.Thread(target=self._flush_periodically, args=(self._pid,), name='metrics-flush', daemon=True).start()
+
+    def values(self):
+        with self._lock:
+            return dict(self._values) if self._pid == os.getpid() else {}
+
+    def update(self, name, key, func):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            self._values[name, key] = func(self._values.get((name, key)))
+            self._dirty = True
+
+    def flush(self):
+        directory = metrics_dir()
+        if not directory:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if self._pid != os.getpid() or (not self._dirty and self._written == directory):
+                    return
+                payload = json.dumps([[name, list(key), value] for (name, key), value in self._values.items()])
+                self._dirty = False
+            if self._written != directory:
+                os.makedirs(directory, exist_ok=True)
+                remove_dead_files(directory)
+                self._written = directory
+            path = os.path.join(directory, self._name)
+            tmp = f'{path}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            os.replace(tmp, path)
+
+    def after_fork(self):
+        # a lock held by another thread at fork time would never be released in the child
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+
+    def _flush_periodically(self, pid):
+        while os.getpid() == pid:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+_store = _ProcessStore()
+atexit.register(_store.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_store.after_fork)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        _store.update(self.name, self._key(labels), lambda value: (value or 0) + amount)
+
+    def _merge(self, total, value):
+        return value if total is None else total + value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, amount, **labels):
+        # stored as a count per bucket (the last one is +Inf) followed by the sum
+        index = bisect.bisect_left(self.buckets, amount)
+
+        def add(value):
+            value = value or [0] * (len(self.buckets) + 1) + [0]
+            value[index] += 1
+            value[-1] += amount
+            return value
+
+        _store.update(self.name, self._key(labels), add)
+
+    def _merge(self, total, value):
+        if len(value) != len(self.buckets) + 2:
+            # written with other buckets (an older deploy)
+            return total
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+
+def collect():
+    """``{(metric name, label values): value}`` summed over every process's file (or this process's)."""
+    directory = metrics_dir()
+    if not directory:
+        return {key: value for key, value in _store.values().items() if key[0] in _registry}
+    try:
+        _store.flush()
+    except OSError:
+        pass
+    totals = {}
+    try:
+        entries = [entry.path for entry in os.scandir(directory) if entry.name.endswith('.json')]
+    except FileNotFoundError:
+        return totals
+    for path in entries:
+        try:
+            with open(path, encoding='utf-8') as fh:
+                rows = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for name, key, value in rows:
+            metric = _registry.get(name)
+            if metric is None or len(key) != len(metric.labelnames):
+                continue
+            key = (name, tuple(key))
+            totals[key] = metric._merge(totals.get(key), value)
+    return {key: value for key, value in totals.items() if value is not None}
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render():
+    """Every registered metric in the Prometheus text format."""
+    totals = collect()
+    lines = []
+    for metric in _registry.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        series = sorted((key, value) for (name, key), value in totals.items() if name == metric.name)
+        for key, value in series:
+            labels = list(zip(metric.labelnames, key))
+            if metric.kind == 'counter':
+                lines.append(f'{metric.name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (math.inf,), value[:-1]):
+                cumulative += count
+                lines.append(f'{metric.name}_bucket{_labels(labels + [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{metric.name}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{metric.name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def authorized(request):
+    """True for staff users and for requests carrying ``METRICS_TOKEN`` as a bearer token."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+
+
+# --- marketplace metrics ----------------------------------------------------
+
+HTTP_REQUESTS = Counter(
+    'market_http_requests_total', 'HTTP requests by URL name, method and status code.', ('view', 'method', 'status'),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'market_http_request_duration_seconds', 'Time to produce a response, by URL name.', ('view',),
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    'market_http_request_queries', 'SQL queries run per request, by URL name.', ('view',),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+CHECKOUT_DURATION = Histogram(
+    'market_checkout_duration_seconds', 'Time to place an order (ok, out_of_stock or error).', ('outcome',),
+)
+CHECKOUT_LINES = Histogram(
+    'market_checkout_lines', 'Lines (distinct products) per placed order.', buckets=(1, 2, 3, 5, 10, 20, 50),
+)
+ORDERS_CREATED = Counter('market_orders_created_total', 'Orders placed.')
+ORDER_STATUS_TRANSITIONS = Counter(
+    'market_order_status_transitions_total', 'Order status changes made by sellers.', ('from_status', 'to_status'),
+)
+CACHE_REQUESTS = Counter(
+    'market_cache_requests_total', 'Cache lookups by cache and result (hit or miss).', ('cache', 'result'),
+)
+
+
+def observe_request(view, method, status, seconds, queries):
+    HTTP_REQUESTS.inc(view=view, method=method, status=status)
+    HTTP_REQUEST_DURATION.observe(seconds, view=view)
+    HTTP_REQUEST_QUERIES.observe(queries, view=view)
@@ -0,0 +1,89 @@
+"""Read replica routing.
+
+With ``DATABASE_REPLICA_URLS`` set, reads made while serving a GET/HEAD
+request (catalog, storefront, dashboards, API lists) go to a random replica;
+everything else reads and writes the primary: unsafe requests such as
+checkout, anything inside a transaction, the task worker and management
+commands. After an unsafe request the client is pinned to the primary for
+``DATABASE_REPLICA_PIN_SECONDS`` (a cookie), so the page it is redirected to
+(the new order, the updated cart) never reads from a replica that is still
+catching up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Allow (or, with ``enabled=False``, forbid) replica reads inside the block."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadsMiddleware:
+    """Send safe requests' reads to the replicas and pin clients to the primary after a write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+        safe = request.method in SAFE_METHODS
+        use_replicas = safe and PIN_COOKIE not in request.COOKIES
+        with replica_reads(use_replicas):
+            response = self.get_response(request)
+        if use_replicas and response.streaming:
+            # streamed bodies (exports) run their queries after the view has returned
+            response.streaming_content = _on_replicas(response.streaming_content)
+        if not safe:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def _on_replicas(content):
+    chunks = iter(content)
+    while True:
+        with replica_reads():
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+        yield chunk
@@ -0,0 +1,183 @@
+"""Product search backed by an inverted token index.
+
+Each product's name, brand, category and description are split into
+lowercase tokens and stored in ``ProductSearchToken`` (kept in sync by the
+signals in ``core.signals``). A query matches products that contain every
+query term as a token prefix; results are ranked by the summed field weights
+of the matching tokens, exact token matches counting double.
+
+All lookups are index range scans on ``token``, so search cost follows the
+number of matching products rather than the size of the catalog.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, When
+
+from .models import Product, ProductSearchToken
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+# field -> weight of a token found in that field
+FIELD_WEIGHTS = (
+    ('name', 3),
+    ('brand', 2),
+    ('category', 2),
+    ('description', 1),
+)
+
+PRICE_BUCKETS = (
+    (None, Decimal('100')),
+    (Decimal('100'), Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('5000')),
+    (Decimal('5000'), None),
+)
+
+
+def tokenize(text):
+    tokens = []
+    for tok in TOKEN_RE.findall((text or '').lower()):
+        if len(tok) < 2 and not tok.isdigit():
+            continue
+        tokens.append(tok[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def build_tokens(name='', brand='', category='', description=''):
+    """Return ``{token: weight}`` for the given field values, keeping the highest weight per token."""
+    values = {'name': name, 'brand': brand, 'category': category, 'description': description}
+    weights = {}
+    for field, weight in FIELD_WEIGHTS:
+        for tok in tokenize(values[field]):
+            if weights.get(tok, 0) < weight:
+                weights[tok] = weight
+    return weights
+
+
+def _product_tokens(product):
+    category = product.category.name if product.category_id else ''
+    return build_tokens(product.name, product.brand, category, product.description)
+
+
+@transaction.atomic
+def index_products(products):
+    """(Re)build the index rows for the given products in two statements."""
+    products = list(products)
+    if not products:
+        return
+    ProductSearchToken.objects.filter(product_id__in=[p.pk for p in products]).delete()
+    ProductSearchToken.objects.bulk_create([
+        ProductSearchToken(product_id=p.pk, token=tok, weight=weight)
+        for p in products
+        for tok, weight in _product_tokens(p).items()
+    ])
+
+
+def index_product(product):
+    index_products([product])
+
+
+def rebuild(batch_size=500):
+    """Reindex the whole catalog in batches. Returns the number of products indexed."""
+    count = 0
+    batch = []
+    for product in Product.objects.select_related('category').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            index_products(batch)
+            count += len(batch)
+            batch = []
+    index_products(batch)
+    return count + len(batch)
+
+
+def _prefix_q(term):
+    # a range keeps the lookup on the token index on every backend (LIKE 'x%' does not on SQLite)
+    return Q(token__gte=term, token__lt=term + '\uffff')
+
+
+def query_terms(query):
+    # unlike indexed tokens, single letters are kept: as prefixes they still find "apple" for "a"
+    return [tok[:MAX_TOKEN_LENGTH] for tok in TOKEN_RE.findall((query or '').lower())]
+
+
+def search(qs, query):
+    """Filter ``qs`` to products matching ``query`` and annotate ``search_rank``, best first."""
+    terms = list(dict.fromkeys(query_terms(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return qs.none()
+    any_term = Q()
+    for term in terms:
+        qs = qs.filter(pk__in=ProductSearchToken.objects.filter(_prefix_q(term)).values('product_id'))
+        any_term |= _prefix_q(term)
+    rank = (
+        ProductSearchToken.objects.filter(any_term, product=OuterRef('pk'))
+        .values('product')
+        .annotate(score=Sum(Case(
+            When(token__in=terms, then=F('weight') * 2),
+            default=F('weight'),
+            output_field=IntegerField(),
+        )))
+        .values('score')
+    )
+    return qs.annotate(search_rank=Subquery(rank, output_field=IntegerField())).order_by('-search_rank', '-created_at')
+
+
+def _decimal(value):
+    try:
+        return Decimal(value) if value not in (None, '') else None
+    except (InvalidOperation, TypeError):
+        return None
+
+
+def apply_filters(qs, params):
+    """Apply the category/brand/price facet filters found in a GET ``params`` dict."""
+    category = params.get('category')
+    if category and str(category).isdigit():
+        qs = qs.filter(category_id=int(category))
+    brand = params.get('brand')
+    if brand:
+        qs = qs.filter(brand__iexact=brand)
+    min_price = _decimal(params.get('min_price'))
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    max_price = _decimal(params.get('max_price'))
+    if max_price is not None:
+        qs = qs.filter(price__lt=max_price)
+    return qs
+
+
+def facets(qs, limit=10):
+    """Category, brand and price-bucket counts for ``qs``."""
+    base = qs.order_by()
+    categories = list(
+        base.filter(category__isnull=False)
+        .values('category_id', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('-count')[:limit]
+    )
+    brands = list(
+        base.exclude(brand='')
+        .values('brand')
+        .annotate(count=Count('id'))
+        .order_by('-count')[:limit]
+    )
+    bucket_counts = {}
+    for i, (low, high) in enumerate(PRICE_BUCKETS):
+        cond = Q()
+        if low is not None:
+            cond &= Q(price__gte=low)
+        if high is not None:
+            cond &= Q(price__lt=high)
+        bucket_counts[f'b{i}'] = Count('id', filter=cond)
+    totals = base.aggregate(**bucket_counts)
+    prices = [
+        {'min_price': low, 'max_price': high, 'count': totals[f'b{i}']}
+        for i, (low, high) in enumerate(PRICE_BUCKETS)
+        if totals[f'b{i}']
+    ]
+    return {'categories': categories, 'brands': brands, 'prices': prices}
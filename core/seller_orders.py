@@ -0,0 +1,51 @@
+"""Seller-side read model for orders.
+
+An order can mix products from several sellers, and a seller only sees their
+own lines of it. ``orders_page`` selects one keyset page of the orders that
+contain the seller's products (see ``core.pagination``) and attaches just
+those lines as ``seller_items``, so a page costs two queries however long the
+seller's history is.
+"""
+from decimal import Decimal
+
+from .models import Order, OrderItem
+from .pagination import keyset_page
+
+STATUSES = dict(Order.ORDER_STATUS)
+
+
+def seller_orders(seller, status=None):
+    """Orders containing ``seller``'s products, optionally limited to one status."""
+    qs = Order.objects.filter(pk__in=OrderItem.objects.filter(product__seller=seller).values('order_id'))
+    if status:
+        qs = qs.filter(status=status)
+    return qs.select_related('buyer').only(
+        'order_number', 'status', 'created_at', 'buyer', 'buyer__username', 'buyer__phone_number'
+    )
+
+
+def attach_items(orders, seller):
+    """Set ``seller_items`` and ``seller_total`` on each order from one query over the seller's lines."""
+    by_pk = {o.pk: o for o in orders}
+    for order in orders:
+        order.seller_items = []
+        order.seller_total = Decimal('0.00')
+    items = (
+        OrderItem.objects.filter(order_id__in=by_pk, product__seller=seller)
+        .select_related('product')
+        .only('order_id', 'quantity', 'price', 'delivery_fee', 'product__name')
+        .order_by('pk')
+    )
+    for item in items:
+        order = by_pk[item.order_id]
+        order.seller_items.append(item)
+        order.seller_total += item.total_with_fee
+    return orders
+
+
+def orders_page(seller, status=None, cursor=None, page_size=20):
+    """Return ``(orders, next_cursor)`` for the seller's orders, newest first."""
+    if status not in STATUSES:
+        status = None
+    orders, next_cursor = keyset_page(seller_orders(seller, status), cursor, page_size)
+    return attach_items(orders, seller), next_cursor
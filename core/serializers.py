@@ -0,0 +1,90 @@
+from rest_framework import serializers
+
+from .models import Category, Order, OrderItem, Product, User
+
+
+def requested_fields(request):
+    """Field names from ``?fields=a,b``, or ``None`` when the client wants everything."""
+    raw = request.query_params.get('fields') if request is not None else None
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """Drop every field not listed in the request's ``?fields=`` parameter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class SellerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'name', 'phone_number']
+
+    def get_name(self, obj):
+        return obj.get_full_name() or obj.username
+
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    seller_name = serializers.CharField(source='seller.username', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+    image = serializers.SerializerMethodField()
+    image_webp = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'sku', 'name', 'description', 'price', 'unit', 'stock', 'brand', 'created_at', 'updated_at',
+            'seller', 'seller_name', 'category', 'category_name', 'image', 'image_webp', 'distance_km',
+        ]
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if url and request is not None else url or None
+
+    def get_image(self, obj):
+        img = obj.primary_image
+        return self._absolute(img.card_url) if img else None
+
+    def get_image_webp(self, obj):
+        img = obj.primary_image
+        return self._absolute(img.card_webp_url) if img else None
+
+    def get_distance_km(self, obj):
+        # only set when the request gave a location (see core.geo)
+        return getattr(obj, 'distance_km', None)
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True, default=None)
+    total = serializers.DecimalField(source='total_with_fee', max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['product', 'product_name', 'quantity', 'price', 'delivery_fee', 'total']
+
+
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_number', 'status', 'created_at', 'delivery_address',
+            'items_subtotal', 'delivery_fee', 'grand_total', 'items',
+        ]
@@ -0,0 +1,102 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, carts, geo, ledger, search, tasks
+from .models import Category, Order, OrderItem, Product, ProductImage, User
+
+# what product and store pages show about a seller, and what distance searches use
+SELLER_PAGE_FIELDS = ('username', 'first_name', 'last_name', 'phone_number', 'seller_lat', 'seller_lng', 'is_seller')
+
+
+@receiver(post_save, sender=OrderItem)
+def orderitem_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ledger.item_added(instance)
+    # checkout bulk-creates items with the totals already set; this covers later edits
+    Order(pk=instance.order_id).refresh_totals()
+
+
+@receiver(post_delete, sender=OrderItem)
+def orderitem_deleted(sender, instance, **kwargs):
+    status = Order.objects.filter(pk=instance.order_id).values_list('status', flat=True).first()
+    try:
+        ledger.item_removed(instance, status)
+    except Product.DoesNotExist:
+        # the product may already be gone in a cascade; rebuild_sales_ledger repairs drift
+        pass
+    if status is not None:
+        Order(pk=instance.order_id).refresh_totals()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_product(instance)
+    caching.invalidate_seller_store(instance.seller_id)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    caching.invalidate_seller_store(instance.seller_id)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def productimage_changed(sender, instance, **kwargs):
+    # the product page shows the image, so it counts as a change to the product
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+    seller_id = Product.objects.filter(pk=instance.product_id).values_list('seller_id', flat=True).first()
+    caching.invalidate_seller_store(seller_id)
+
+
+@receiver(pre_save, sender=User)
+def user_geohash(sender, instance, **kwargs):
+    if instance.seller_lat is not None and instance.seller_lng is not None:
+        instance.seller_geohash = geo.encode(instance.seller_lat, instance.seller_lng)
+    else:
+        instance.seller_geohash = ''
+
+
+@receiver(pre_save, sender=User)
+def user_seller_fields(sender, instance, update_fields=None, **kwargs):
+    # logins, password changes and checkout's address/phone saves mostly change nothing pages show
+    instance._seller_page_changed = False
+    if update_fields is not None and not set(update_fields) & set(SELLER_PAGE_FIELDS):
+        return
+    old = User.objects.filter(pk=instance.pk).values(*SELLER_PAGE_FIELDS).first() if instance.pk else None
+    if not instance.is_seller and not (old and old['is_seller']):
+        return
+    instance._seller_page_changed = old is None or any(old[f] != getattr(instance, f) for f in SELLER_PAGE_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_seller_page_changed', True):
+        return
+    # the store header shows the seller's name and phone
+    caching.invalidate_seller_store(instance.pk)
+    # so do product pages (and distance searches use the location)
+    Product.objects.filter(seller=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    caching.invalidate_categories()
+    # category names are indexed with their products; large categories are reindexed off the request path
+    if not created and not raw:
+        tasks.reindex_category.delay(category_id=instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    caching.invalidate_categories()
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None:
+        carts.merge_on_login(request, user)
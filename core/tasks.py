@@ -0,0 +1,219 @@
+"""Database-backed background tasks.
+
+Functions decorated with ``@task`` can be queued with ``fn.delay(**kwargs)``;
+the call is stored as a ``Task`` row in the same transaction as the caller's
+writes and executed later by ``python manage.py run_worker``. Failed tasks are
+retried with exponential backoff up to ``Task.max_attempts``.
+
+With ``TASKS_EAGER = True`` (the default when ``DEBUG``) tasks run in-process
+right after the surrounding transaction commits, which is handy when no worker
+is running. ``backlog()`` tells ``/healthz/`` whether the worker keeps up.
+"""
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Order, OrderItem, ProductImage, Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+# a task still 'running' after this long is assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=15)
+
+
+def task(fn):
+    """Register ``fn`` as a background task and give it a ``delay()`` helper."""
+    _registry[fn.__name__] = fn
+    fn.delay = lambda **payload: enqueue(fn.__name__, **payload)
+    return fn
+
+
+def enqueue(name, **payload):
+    if name not in _registry:
+        raise KeyError(f'Unknown task {name!r}')
+    if getattr(settings, 'TASKS_EAGER', False):
+        transaction.on_commit(lambda: _run_eager(name, payload))
+        return None
+    return Task.objects.create(name=name, payload=payload)
+
+
+def _run_eager(name, payload):
+    # a failing task must not break the request that queued it; keep a failed row like the worker does
+    try:
+        _registry[name](**payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.error('Task %s failed:\n%s', name, error)
+        Task.objects.create(name=name, payload=payload, status='failed', attempts=1, last_error=error)
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS))
+
+
+def requeue_stale():
+    # a task that keeps killing its worker would otherwise be requeued forever
+    cutoff = timezone.now() - STALE_AFTER
+    stale = Task.objects.filter(status='running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_at=None, last_error='Worker stopped while running the task (final attempt).'
+    )
+    if failed:
+        logger.error('%s stale task(s) failed permanently after their last attempt', failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(status='queued', locked_at=None)
+
+
+def claim(limit):
+    """Atomically mark up to ``limit`` due tasks as running and return them.
+
+    Each row is claimed with a conditional UPDATE, so several workers can poll
+    the same table without picking up the same task.
+    """
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    claimed = []
+    for pk in candidates:
+        if Task.objects.filter(pk=pk, status='queued').update(status='running', locked_at=now, attempts=F('attempts') + 1):
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def run(task_row):
+    fn = _registry.get(task_row.name)
+    try:
+        if fn is None:
+            raise KeyError(f'Unknown task {task_row.name!r}')
+        fn(**task_row.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if task_row.attempts >= task_row.max_attempts:
+            logger.error('Task %s #%s failed permanently:\n%s', task_row.name, task_row.pk, error)
+            Task.objects.filter(pk=task_row.pk).update(status='failed', locked_at=None, last_error=error)
+        else:
+            delay = backoff(task_row.attempts)
+            logger.warning('Task %s #%s failed, retrying in %s', task_row.name, task_row.pk, delay)
+            Task.objects.filter(pk=task_row.pk).update(
+                status='queued', locked_at=None, last_error=error, run_at=timezone.now() + delay
+            )
+    else:
+        Task.objects.filter(pk=task_row.pk).update(status='done', locked_at=None, last_error='')
+    finally:
+        # worker threads hold their own connections; don't leak them between tasks
+        connections.close_all()
+
+
+def backlog():
+    """``{'due', 'oldest_seconds', 'status'}`` for queued tasks whose time has come.
+
+    ``status`` is ``'backlog'`` once the oldest has waited ``TASKS_BACKLOG_SECONDS``,
+    which usually means no worker is running.
+    """
+    from django.db.models import Count, Min
+
+    now = timezone.now()
+    row = Task.objects.filter(status='queued', run_at__lte=now).aggregate(due=Count('id'), oldest=Min('run_at'))
+    waited = int((now - row['oldest']).total_seconds()) if row['oldest'] else 0
+    limit = getattr(settings, 'TASKS_BACKLOG_SECONDS', 300)
+    return {'due': row['due'], 'oldest_seconds': waited, 'status': 'backlog' if waited >= limit else 'ok'}
+
+
+def purge_finished(days=7):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Task.objects.filter(status='done', created_at__lt=cutoff).delete()[0]
+
+
+def run_worker(concurrency=4, poll_interval=1.0, once=False, stop_event=None):
+    """Poll for due tasks and run them on a thread pool until ``stop_event`` is set."""
+    stop_event = stop_event or threading.Event()
+    in_flight = set()
+    last_maintenance = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task') as pool:
+        while not stop_event.is_set():
+            if time.monotonic() - last_maintenance > 300:
+                requeue_stale()
+                purge_finished()
+                last_maintenance = time.monotonic()
+            in_flight = {f for f in in_flight if not f.done()}
+            free = concurrency - len(in_flight)
+            rows = claim(free) if free > 0 else []
+            for row in rows:
+                in_flight.add(pool.submit(run, row))
+            if once:
+                break
+            if not rows:
+                stop_event.wait(poll_interval)
+        for future in in_flight:
+            future.result()
+
+
+# --- tasks ---------------------------------------------------------------
+
+@task
+def generate_thumbnails(image_id):
+    from .images import make_thumbnails
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is not None:
+        make_thumbnails(product_image)
+
+
+@task
+def generate_thumbnails_for(image_ids):
+    # one task per imported batch; images that already have thumbnails are skipped, so retries are cheap
+    from .images import make_thumbnails
+    for product_image in ProductImage.objects.filter(pk__in=image_ids):
+        make_thumbnails(product_image)
+
+
+@task
+def reindex_category(category_id):
+    from . import search
+    from .models import Product
+    search.index_products(Product.objects.filter(category_id=category_id).select_related('category'))
+
+
+@task
+def notify_order_placed(order_id):
+    order = Order.objects.select_related('buyer').filter(pk=order_id).first()
+    if order is None:
+        return
+    if order.buyer.email:
+        send_mail(
+            f'Order {order.order_number} received',
+            f'Thanks for your order! Order {order.order_number} is now {order.status}.',
+            None,
+            [order.buyer.email],
+        )
+    sellers = {}
+    for item in OrderItem.objects.filter(order=order, product__isnull=False).select_related('product__seller'):
+        seller = item.product.seller
+        if seller.email:
+            sellers.setdefault(seller.email, []).append(f'{item.quantity} x {item.product.name}')
+    for email, lines in sellers.items():
+        send_mail(f'New order {order.order_number}', 'You have a new order:\n' + '\n'.join(lines), None, [email])
+
+
+@task
+def notify_order_status(order_id):
+    order = Order.objects.select_related('buyer').filter(pk=order_id).first()
+    if order is not None and order.buyer.email:
+        send_mail(
+            f'Order {order.order_number} is {order.status}',
+            f'Your order {order.order_number} is now {order.status}.',
+            None,
+            [order.buyer.email],
+        )
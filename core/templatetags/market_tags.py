@@ -0,0 +1,21 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, **kwargs):
+    """Return the current query string with the given params replaced (``None``/'' removes them).
+
+    Changing any filter drops ``page`` so the listing restarts from the first page.
+    """
+    query = context['request'].GET.copy()
+    if 'page' not in kwargs:
+        query.pop('page', None)
+    for key, value in kwargs.items():
+        if value is None or value == '':
+            query.pop(key, None)
+        else:
+            query[key] = value
+    encoded = query.urlencode()
+    return f'?{encoded}' if encoded else '?'
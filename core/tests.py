@@ -0,0 +1,524 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import caching, checkout, geo, inventory, ledger, pricing, prometheus, search
+from .checkout import OutOfStock, place_order
+from .instrumentation import assert_within_budget
+from .models import Cart, CartItem, Category, DiscountTier, Order, Product, ProductImage, Task, User
+from .views import HomeView
+
+# catalog ETag (products, categories), count, category list, the page of products with
+# seller and category joined, and one query for all of the page's images
+HOME_QUERIES = 6
+
+
+def seed_catalog(products=30, images_per_product=3):
+    seller = User.objects.create_user('seller', password='pw', is_seller=True, seller_lat=14.6, seller_lng=120.98)
+    categories = [Category.objects.create(name=name) for name in ('Fruit', 'Vegetables')]
+    for n in range(products):
+        product = Product.objects.create(
+            seller=seller, category=categories[n % 2], name=f'Product {n}', brand='Farm',
+            price=Decimal('10.00') + n, stock=100, sku=f'SKU{n}',
+        )
+        for i in range(images_per_product):
+            ProductImage.objects.create(product=product, image=f'products/{n}-{i}.jpg')
+    return seller
+
+
+class HomeQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog()
+
+    def home_queries(self, page_size):
+        cache.clear()
+        with mock.patch.object(HomeView, 'paginate_by', page_size):
+            with self.assertNumQueries(HOME_QUERIES):
+                response = self.client.get('/')
+        self.assertEqual(len(response.context['products']), page_size)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.home_queries(4)
+        self.home_queries(24)
+
+    def test_card_cache_counts_once_per_outcome(self):
+        cache.clear()
+        products = Product.objects.for_listing()[:5]
+        caching.attach_cards(products)
+        with mock.patch.object(caching.prometheus.CACHE_REQUESTS, 'inc') as inc:
+            caching.attach_cards(products)
+        inc.assert_called_once_with(5, cache='product_card', result='hit')
+        self.assertEqual(caching.stats()['product_card'], {'hits': 5, 'misses': 5, 'hit_rate': 0.5})
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        for name in ('Apple juice', 'Banana chips', 'Avocado'):
+            Product.objects.create(seller=seller, name=name, price=Decimal('5.00'))
+
+    def names(self, query):
+        return sorted(search.search(Product.objects.all(), query).values_list('name', flat=True))
+
+    def test_terms_match_token_prefixes(self):
+        self.assertEqual(self.names('ban chi'), ['Banana chips'])
+        self.assertEqual(self.names('juice apple'), ['Apple juice'])
+
+    def test_single_letter_matches_as_prefix(self):
+        self.assertEqual(self.names('a'), ['Apple juice', 'Avocado'])
+
+
+class ApiConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(products=5, images_per_product=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_list_is_not_queried_again(self):
+        url = reverse('api-product-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotEqual(self.client.get(url, {'page_size': 2})['ETag'], etag)
+
+    def test_product_change_updates_the_list_etag(self):
+        url = reverse('api-product-list')
+        etag = self.client.get(url)['ETag']
+        product = Product.objects.first()
+        product.price = Decimal('1.00')
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Manila, Quezon City (~11 km away), Cebu (~570 km away) and a seller without a location
+        sellers = {
+            'manila': (14.5995, 120.9842), 'qc': (14.6760, 121.0437), 'cebu': (10.3157, 123.8854), 'nowhere': (None, None),
+        }
+        for name, (lat, lng) in sellers.items():
+            seller = User.objects.create_user(name, password='pw', is_seller=True, seller_lat=lat, seller_lng=lng)
+            Product.objects.create(seller=seller, name=f'{name} rice', price=Decimal('50.00'))
+
+    def located(self, **params):
+        params = {'lat': '14.5995', 'lng': '120.9842', **params}
+        qs, applied = geo.apply_location(Product.objects.all(), params)
+        self.assertTrue(applied)
+        return [(p.name, p.distance_km) for p in qs]
+
+    def test_sort_orders_every_product_with_unknown_distances_last(self):
+        rows = self.located(sort='distance')
+        self.assertEqual([name for name, _ in rows], ['manila rice', 'qc rice', 'cebu rice', 'nowhere rice'])
+        self.assertEqual(rows[0][1], 0)
+        self.assertAlmostEqual(rows[1][1], 11.0, delta=1)
+        self.assertAlmostEqual(rows[2][1], 570, delta=15)
+        self.assertIsNone(rows[3][1])
+
+    def test_within_km_filters(self):
+        self.assertEqual(
+            sorted(name for name, _ in self.located(within_km='25')), ['manila rice', 'qc rice'],
+        )
+        self.assertEqual([name for name, _ in self.located(within_km='5', sort='distance')], ['manila rice'])
+
+    def test_pages_sort_by_distance(self):
+        params = {'lat': '14.5995', 'lng': '120.9842', 'sort': 'distance', 'page_size': 2}
+        response = self.client.get(reverse('api-product-list'), params)
+        names = [row['name'] for row in response.json()['results']]
+        response = self.client.get(response.json()['next'])
+        names += [row['name'] for row in response.json()['results']]
+        self.assertEqual(names, ['manila rice', 'qc rice', 'cebu rice', 'nowhere rice'])
+        response = self.client.get(reverse('home'), params)
+        self.assertEqual([p.name for p in response.context['products']][:4], names)
+
+    def test_distances_match_nearby_sellers(self):
+        nearby = geo.nearby_sellers(14.5995, 120.9842, 1000)
+        by_name = dict(User.objects.filter(pk__in=nearby).values_list('username', 'pk'))
+        for name, km in self.located(sort='distance')[:3]:
+            self.assertAlmostEqual(km, nearby[by_name[name.split()[0]]], delta=0.01)
+
+
+class PricingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        DiscountTier.objects.all().delete()
+        DiscountTier.objects.create(min_quantity=5, percent=Decimal('5.00'), sellers_only=True)
+        DiscountTier.objects.create(min_quantity=10, percent=Decimal('10.00'), sellers_only=True)
+        DiscountTier.objects.create(min_quantity=50, percent=Decimal('20.00'), sellers_only=False)
+        DiscountTier.objects.create(min_quantity=100, percent=Decimal('50.00'), active=False)
+        cls.seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        cls.other_seller = User.objects.create_user('other', password='pw', is_seller=True)
+        cls.buyer = User.objects.create_user('buyer', password='pw')
+        cls.product = Product.objects.create(seller=cls.seller, name='Rice', price=Decimal('3.33'))
+
+    def test_load_tiers_skips_inactive_highest_first(self):
+        self.assertEqual([t.min_quantity for t in pricing.load_tiers()], [50, 10, 5])
+
+    def test_tier_boundaries(self):
+        tiers = pricing.load_tiers()
+        for quantity, expected in ((4, '0'), (5, '0.05'), (9, '0.05'), (10, '0.1'), (49, '0.1'), (50, '0.2')):
+            self.assertEqual(pricing.discount_for(quantity, tiers, seller_discounts=True), Decimal(expected), quantity)
+
+    def test_seller_only_tiers(self):
+        tiers = pricing.load_tiers()
+        self.assertEqual(pricing.discount_for(10, tiers, seller_discounts=False), Decimal('0'))
+        self.assertEqual(pricing.discount_for(50, tiers, seller_discounts=False), Decimal('0.2'))
+
+    def discount(self, user, quantity=10):
+        items, _ = pricing.price_lines(user, [(self.product, quantity)])
+        return items[0]['discount_pct']
+
+    def test_eligibility(self):
+        # another seller restocking gets the seller tiers
+        self.assertEqual(self.discount(self.other_seller), Decimal('0.1'))
+        # buyers, anonymous visitors and the product's own seller don't
+        self.assertEqual(self.discount(self.buyer), Decimal('0'))
+        self.assertEqual(self.discount(AnonymousUser()), Decimal('0'))
+        self.assertEqual(self.discount(self.seller), Decimal('0'))
+
+    def test_rounding(self):
+        # the unit price is rounded to centavos before it is multiplied by the quantity
+        items, subtotal = pricing.price_lines(self.other_seller, [(self.product, 10), (self.product, 1)])
+        self.assertEqual(items[0]['unit_price'], Decimal('3.00'))  # 3.33 * 0.9 = 2.997
+        self.assertEqual(items[0]['total_price'], Decimal('30.00'))
+        self.assertEqual(items[1]['total_price'], Decimal('3.33'))
+        self.assertEqual(subtotal, Decimal('33.33'))
+
+    def test_tier_prices(self):
+        prices = pricing.tier_prices(self.product)
+        self.assertEqual(
+            [(p['min_quantity'], p['unit_price']) for p in prices],
+            [(5, Decimal('3.16')), (10, Decimal('3.00')), (50, Decimal('2.66'))],
+        )
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        cls.buyer = User.objects.create_user('buyer', password='pw')
+        cls.rice = Product.objects.create(seller=cls.seller, name='Rice', price=Decimal('50.00'), stock=5)
+        cls.eggs = Product.objects.create(seller=cls.seller, name='Eggs', price=Decimal('8.00'), stock=1)
+
+    def item(self, product, quantity):
+        return {'product': product, 'quantity': quantity, 'unit_price': product.price}
+
+    def stock(self, product):
+        return Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+
+    def test_reserves_stock_and_stores_totals(self):
+        order = place_order(self.buyer, [self.item(self.rice, 2), self.item(self.eggs, 1)])
+        self.assertEqual(self.stock(self.rice), 3)
+        self.assertEqual(self.stock(self.eggs), 0)
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.items_subtotal, Decimal('108.00'))
+        self.assertEqual(order.grand_total, order.items_subtotal + order.delivery_fee)
+
+    def test_last_unit_is_sold_once(self):
+        place_order(self.buyer, [self.item(self.eggs, 1)])
+        with self.assertRaises(OutOfStock):
+            place_order(self.buyer, [self.item(self.eggs, 1)])
+        self.assertEqual(self.stock(self.eggs), 0)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_out_of_stock_leaves_nothing_behind(self):
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(self.buyer, [self.item(self.rice, 2), self.item(self.eggs, 2)])
+        self.assertEqual(raised.exception.product, self.eggs)
+        self.assertEqual(self.stock(self.rice), 5)
+        self.assertEqual(self.stock(self.eggs), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_retries_when_the_database_is_locked(self):
+        real = checkout._place_order_once
+        calls = []
+
+        def locked_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return real(*args)
+
+        with mock.patch.object(checkout, '_place_order_once', side_effect=locked_once), \
+                mock.patch.object(checkout.time, 'sleep'):
+            order = place_order(self.buyer, [self.item(self.rice, 1)])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.stock(self.rice), 4)
+        self.assertEqual(Order.objects.get().pk, order.pk)
+
+    def test_gives_up_after_max_attempts(self):
+        with mock.patch.object(checkout, '_place_order_once', side_effect=OperationalError('database is locked')), \
+                mock.patch.object(checkout.time, 'sleep'):
+            with self.assertRaises(OperationalError):
+                place_order(self.buyer, [self.item(self.rice, 1)])
+        self.assertEqual(self.stock(self.rice), 5)
+
+
+class LedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        cls.buyer = User.objects.create_user('buyer', password='pw')
+        cls.rice = Product.objects.create(seller=cls.seller, name='Rice', price=Decimal('50.00'), stock=10)
+
+    def setUp(self):
+        self.order = place_order(self.buyer, [{'product': self.rice, 'quantity': 2, 'unit_price': self.rice.price}])
+        self.line_amount = sum(item.quantity * item.price + item.delivery_fee for item in self.order.items.all())
+        self.client.force_login(self.seller)
+
+    def set_status(self, status):
+        self.client.post(reverse('seller_update_order_status', args=[self.order.pk]), {'status': status})
+
+    def total(self):
+        return ledger.seller_total(self.seller)
+
+    def test_delivery_credits_the_seller_once(self):
+        self.set_status('shipped')
+        self.assertEqual(self.total(), Decimal('0.00'))
+        self.set_status('delivered')
+        self.set_status('delivered')
+        self.assertEqual(self.total(), self.line_amount)
+
+    def test_leaving_delivered_debits_the_seller(self):
+        self.set_status('delivered')
+        self.set_status('cancelled')
+        self.assertEqual(self.total(), Decimal('0.00'))
+
+    def test_deleting_a_delivered_item_debits_the_seller(self):
+        self.set_status('delivered')
+        self.order.items.get().delete()
+        self.assertEqual(self.total(), Decimal('0.00'))
+
+    def test_rebuild_matches_the_running_totals(self):
+        self.set_status('delivered')
+        place_order(self.buyer, [{'product': self.rice, 'quantity': 1, 'unit_price': self.rice.price}])
+        running = self.total()
+        ledger.rebuild()
+        self.assertEqual(self.total(), running)
+
+
+class CartMergeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        cls.buyer = User.objects.create_user('buyer', password='pw')
+        cls.rice = Product.objects.create(seller=cls.seller, name='Rice', price=Decimal('50.00'), stock=10)
+        cls.eggs = Product.objects.create(seller=cls.seller, name='Eggs', price=Decimal('8.00'), stock=10)
+
+    def add_anonymously(self, product, quantity):
+        self.client.post(reverse('product_detail', args=[product.pk]), {'quantity': quantity})
+
+    def log_in(self):
+        response = self.client.post(reverse('login'), {'username': 'buyer', 'password': 'pw'})
+        self.assertEqual(response.status_code, 302)
+
+    def lines(self):
+        cart = Cart.objects.get(user=self.buyer)
+        return dict(cart.items.values_list('product__name', 'quantity'))
+
+    def test_anonymous_cart_becomes_the_users(self):
+        self.add_anonymously(self.rice, 2)
+        self.log_in()
+        self.assertEqual(self.lines(), {'Rice': 2})
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_quantities_add_up_with_the_users_cart(self):
+        own = Cart.objects.create(user=self.buyer)
+        CartItem.objects.create(cart=own, product=self.rice, quantity=1)
+        CartItem.objects.create(cart=own, product=self.eggs, quantity=1)
+        self.add_anonymously(self.rice, 2)
+        self.log_in()
+        self.assertEqual(self.lines(), {'Rice': 3, 'Eggs': 1})
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_login_without_an_anonymous_cart_changes_nothing(self):
+        self.log_in()
+        self.assertFalse(Cart.objects.exists())
+
+
+class InventoryUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', password='pw', is_seller=True)
+        other = User.objects.create_user('other', password='pw', is_seller=True)
+        cls.rice = Product.objects.create(seller=cls.seller, name='Rice', price=Decimal('50.00'), stock=10, sku='RICE')
+        cls.eggs = Product.objects.create(seller=cls.seller, name='Eggs', price=Decimal('8.00'), stock=10, sku='EGGS')
+        cls.foreign = Product.objects.create(seller=other, name='Corn', price=Decimal('5.00'), stock=10, sku='CORN')
+
+    def test_valid_rows_are_applied(self):
+        result = inventory.apply_updates(self.seller, [
+            {'sku': 'RICE', 'price': '55.5'},
+            {'product_id': self.eggs.pk, 'stock': 3},
+        ])
+        self.assertEqual(result, {'updated': 2, 'errors': []})
+        self.rice.refresh_from_db()
+        self.eggs.refresh_from_db()
+        self.assertEqual((self.rice.price, self.rice.stock), (Decimal('55.50'), 10))
+        self.assertEqual((self.eggs.price, self.eggs.stock), (Decimal('8.00'), 3))
+
+    def test_bad_rows_are_reported_not_raised(self):
+        rows = [
+            {'sku': 'RICE', 'price': 'NaN'},
+            {'sku': 'RICE', 'price': 'sNaN'},
+            {'sku': 'RICE', 'price': 'Infinity'},
+            {'sku': 'RICE', 'price': '-1'},
+            {'sku': 'RICE', 'price': 'cheap'},
+            {'sku': 'RICE', 'stock': -2},
+            {'sku': 'RICE', 'stock': float('inf')},
+            {'sku': 'RICE'},
+            {'price': '5'},
+            'not an object',
+            {'sku': 'CORN', 'price': '1'},
+            {'sku': 'NOPE', 'price': '1'},
+            {'sku': 'EGGS', 'price': '9'},
+        ]
+        result = inventory.apply_updates(self.seller, rows)
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual([e['row'] for e in result['errors']], list(range(1, 13)))
+        self.assertIn('invalid price', result['errors'][0]['error'])
+        self.assertIn('out of range', result['errors'][3]['error'])
+        self.assertIn('unknown product', result['errors'][10]['error'])
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.price, Decimal('5.00'))
+        self.rice.refresh_from_db()
+        self.assertEqual((self.rice.price, self.rice.stock), (Decimal('50.00'), 10))
+
+
+class PrometheusTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write_file(self, pid, orders):
+        with open(os.path.join(self.directory, f'{pid}-test.json'), 'w') as fh:
+            json.dump([['market_orders_created_total', [], orders]], fh)
+
+    def orders_created(self):
+        return prometheus.collect().get(('market_orders_created_total', ()), 0)
+
+    def test_files_of_running_processes_are_added_up(self):
+        before = self.orders_created()
+        self.write_file(os.getppid(), 5)
+        prometheus.ORDERS_CREATED.inc()
+        self.assertEqual(self.orders_created(), before + 6)
+
+    def test_files_of_dead_processes_are_removed(self):
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        self.write_file(int(exited.stdout), 5)
+        before = self.orders_created()
+        prometheus.ORDERS_CREATED.inc()
+        self.assertEqual(self.orders_created(), before + 1)
+        self.assertEqual(os.listdir(self.directory), [prometheus._store._name])
+
+
+class HealthzTests(TestCase):
+    def test_reports_a_task_backlog(self):
+        self.assertEqual(self.client.get(reverse('healthz')).json()['tasks']['status'], 'ok')
+        Task.objects.create(name='reindex_category', run_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs('core.tasks', 'WARNING'):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tasks']['status'], 'backlog')
+        self.assertEqual(response.json()['tasks']['due'], 1)
+
+
+class PerformanceBudgetTests(TestCase):
+    """Every view with a ``PERFORMANCE_BUDGETS`` entry stays within its query budget on seeded data."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = seed_catalog()
+        cls.buyer = User.objects.create_user('buyer', password='pw')
+        cls.admin = User.objects.create_superuser('admin', password='pw')
+        products = list(Product.objects.order_by('pk')[:6])
+        for n in range(10):
+            items = [{'product': p, 'quantity': 1, 'unit_price': p.price} for p in products[n % 3:n % 3 + 3]]
+            place_order(cls.buyer, items, address='Somewhere')
+        cart = Cart.objects.create(user=cls.buyer)
+        CartItem.objects.bulk_create(CartItem(cart=cart, product=p, quantity=2) for p in products)
+        cls.product = products[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, user=None, args=(), params=None):
+        if user is not None:
+            self.client.force_login(user)
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_catalog_pages(self):
+        category = Category.objects.first()
+        location = {'lat': '14.6', 'lng': '121.0'}
+        variants = [
+            {}, {'q': 'product'}, {'category': category.pk}, {**location, 'sort': 'distance'},
+            {**location, 'within_km': '25'}, {**location, 'q': 'p', 'category': category.pk, 'sort': 'distance'},
+        ]
+        # the seller is signed in too, and gets the most per-user reads
+        for user in (None, self.buyer, self.seller):
+            self.client.logout()
+            for params in variants:
+                with self.subTest(user=user, params=params):
+                    cache.clear()
+                    assert_within_budget(self.get('home', user, params=params))
+            cache.clear()
+            assert_within_budget(self.get('product_detail', user, args=[self.product.pk]))
+            assert_within_budget(self.get('seller_store', user, args=[self.seller.pk]))
+
+    def test_add_to_cart(self):
+        url = reverse('product_detail', args=[self.product.pk])
+        for user in (None, self.buyer):
+            if user is not None:
+                self.client.force_login(user)
+            for _ in range(2):
+                response = self.client.post(url, {'quantity': 1})
+                self.assertEqual(response.status_code, 302)
+                assert_within_budget(response)
+
+    def test_buyer_pages(self):
+        assert_within_budget(self.get('cart', self.buyer))
+        assert_within_budget(self.get('checkout', self.buyer))
+        assert_within_budget(self.get('buyer_dashboard', self.buyer))
+
+    def test_large_checkout(self):
+        Product.objects.update(stock=100)
+        buyer = User.objects.create_user('bulk', password='pw')
+        cart = Cart.objects.create(user=buyer)
+        CartItem.objects.bulk_create(CartItem(cart=cart, product=p, quantity=1) for p in Product.objects.all())
+        assert_within_budget(self.get('checkout', buyer))
+        response = self.client.post(reverse('checkout'), {'address': 'Somewhere', 'phone': '0917'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Order.objects.get(buyer=buyer).items.count(), 30)
+        assert_within_budget(response)
+
+    def test_seller_dashboard(self):
+        assert_within_budget(self.get('seller_dashboard', self.seller))
+
+    def test_admin_dashboard(self):
+        assert_within_budget(self.get('admin_dashboard', self.admin))
@@ -6,15 +6,21 @@ from .views import (
     update_cart,
     SignUpView,
     checkout_view,
+    checkout_quote,
     order_detail,
     buyer_dashboard,
     seller_dashboard,
     seller_update_order_status,
     seller_add_product,
+    seller_import_products,
     seller_edit_product,
     seller_delete_product,
     profile_view,
     admin_dashboard,
+    export_orders,
+    healthz,
+    performance_stats,
+    prometheus_metrics,
     CustomLoginView,
 )
 from django.contrib.auth.views import LogoutView
@@ -28,6 +34,7 @@ urlpatterns = [
     path('cart/update/', update_cart, name='update_cart'),
     path('signup/', SignUpView.as_view(), name='signup'),
     path('checkout/', checkout_view, name='checkout'),
+    path('checkout/quote/', checkout_quote, name='checkout_quote'),
     path('order/<int:pk>/', order_detail, name='order_detail'),
     path('login/', CustomLoginView.as_view(), name='login'),
     path('accounts/login/', CustomLoginView.as_view(), name='accounts_login'),
@@ -39,8 +46,13 @@ urlpatterns = [
     path('seller/<int:pk>/', seller_store, name='seller_store'),
     path('seller/order/<int:pk>/update/', seller_update_order_status, name='seller_update_order_status'),
     path('seller/product/add/', seller_add_product, name='seller_add_product'),
+    path('seller/product/import/', seller_import_products, name='seller_import_products'),
     path('seller/product/<int:pk>/edit/', seller_edit_product, name='seller_edit_product'),
     path('seller/product/<int:pk>/delete/', seller_delete_product, name='seller_delete_product'),
     path('admin-dashboard/', admin_dashboard, name='admin_dashboard'),
+    path('exports/orders/', export_orders, name='export_orders'),
     path('profile/', profile_view, name='profile'),
+    path('healthz/', healthz, name='healthz'),
+    path('staff/performance/', performance_stats, name='performance_stats'),
+    path('metrics', prometheus_metrics, name='metrics'),
 ]
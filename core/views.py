@@ -1,25 +1,38 @@
+import csv
+import zipfile
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.views import LoginView as DjangoLoginView
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.generic import ListView, DetailView, FormView
 
 from .forms import SignUpForm, AddToCartForm
 from .forms import ProfileForm
-from django.db.models import Q
-from .models import Product, Category, ProductImage, Order, OrderItem
-from decimal import Decimal
-from .forms import ProductForm
+from django.db import transaction
+from .models import Product, Order
+from .forms import CatalogImportForm, ProductForm
+from . import caching, carts, catalog_import, delivery, exports, geo, ledger, metrics, pricing, prometheus, search, seller_orders, tasks
+from .checkout import OutOfStock, place_order
+from .pagination import decode_cursor, keyset_page
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
-from django.http import HttpResponseForbidden
-from django.conf import settings
-import math
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 
 
+@method_decorator([
+    caching.conditional_page(etag_func=caching.catalog_etag),
+    caching.cache_anonymous_page(lambda request: [caching.CATALOG]),
+], name='get')
 class HomeView(ListView):
     model = Product
     template_name = 'home.html'
@@ -27,25 +40,49 @@ class HomeView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        qs = super().get_queryset().order_by('-created_at')
-        q = self.request.GET.get('q')
+        qs = super().get_queryset().for_listing().order_by('-created_at')
+        q = self.request.GET.get('q', '').strip()
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q) | Q(description__icontains=q) | Q(brand__icontains=q)
-            )
+            qs = search.search(qs, q)
+        qs = search.apply_filters(qs, self.request.GET)
+        # ?lat=&lng= with within_km=N and/or sort=distance (see core.geo)
+        qs, self.located = geo.apply_location(qs, self.request.GET)
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['q'] = self.request.GET.get('q', '')
+        params = self.request.GET
+        ctx['q'] = params.get('q', '')
+        ctx['located'] = self.located
+        ctx['radius_choices'] = (5, 10, 25, 50, 100)
+        filtering = self.located or any(params.get(k) for k in ('q', 'category', 'brand', 'min_price', 'max_price'))
+        # facets only for searches/filtered views, so the plain home page stays a single indexed read
+        ctx['facets'] = search.facets(self.object_list) if filtering else None
+        ctx['categories'] = None if filtering else caching.category_list()
+        ctx['products'] = caching.attach_cards(ctx['products'])
         return ctx
 
 
+def _product_last_modified(request, pk):
+    # the page shows the product and its category name
+    row = Product.objects.filter(pk=pk).values_list('updated_at', 'category__updated_at').first()
+    return max(t for t in row if t is not None) if row else None
+
+
+# anonymous visitors get a shared cached page, so their add-to-cart form reads the CSRF token from the cookie
+@method_decorator([
+    ensure_csrf_cookie,
+    caching.conditional_page(last_modified_func=_product_last_modified),
+    caching.cache_anonymous_page(lambda request, pk: [caching.CATALOG, caching.product_namespace(pk)]),
+], name='get')
 class ProductDetailView(DetailView, FormView):
     model = Product
     template_name = 'product_detail.html'
     form_class = AddToCartForm
 
+    def get_queryset(self):
+        return Product.objects.for_listing()
+
     def get_success_url(self):
         return reverse('cart')
 
@@ -64,58 +101,29 @@ class ProductDetailView(DetailView, FormView):
                 return redirect('checkout')
 
             # Otherwise, add to cart (default behavior)
-            cart = request.session.get('cart', {})
-            item = cart.get(str(product.id), {'quantity': 0, 'price': str(product.price)})
-            item['quantity'] = item.get('quantity', 0) + qty
-            cart[str(product.id)] = item
-            request.session['cart'] = cart
+            carts.add(carts.get_cart(request, create=True), product.id, qty)
             messages.success(request, 'Added to cart')
             return redirect('cart')
         return self.get(request, *args, **kwargs)
 
 
 def cart_view(request):
-    cart = request.session.get('cart', {})
-    product_ids = [int(pid) for pid in cart.keys()]
-    products = Product.objects.filter(id__in=product_ids)
-    items = []
-    subtotal = Decimal('0.00')
-    for p in products:
-        qty = cart.get(str(p.id), {}).get('quantity', 0)
-        unit_price = Decimal(str(p.price))
-        discount_pct = Decimal('0')
-        # Apply bulk discount only if logged-in user is a seller and buying another seller's product
-        if request.user.is_authenticated and getattr(request.user, 'is_seller', False) and p.seller != request.user:
-            if qty >= 10:
-                discount_pct = Decimal('0.10')
-            elif qty >= 5:
-                discount_pct = Decimal('0.05')
-
-        effective_unit = (unit_price * (Decimal('1.0') - discount_pct)).quantize(Decimal('0.01'))
-        total_price = (effective_unit * qty).quantize(Decimal('0.01'))
-        subtotal += total_price
-        items.append({'product': p, 'quantity': qty, 'unit_price': effective_unit, 'total_price': total_price, 'discount_pct': discount_pct})
+    cart = carts.get_cart(request)
+    items, subtotal = pricing.price_lines(request.user, carts.lines(cart, Product.objects.for_listing()))
     return render(request, 'cart.html', {'items': items, 'subtotal': subtotal})
 
 
 def update_cart(request):
     if request.method == 'POST':
-        cart = request.session.get('cart', {})
+        cart = carts.get_cart(request)
         action = request.POST.get('action')
         pid = request.POST.get('product_id')
-        if not pid:
+        if not pid or not pid.isdigit() or cart is None:
             return redirect('cart')
         if action == 'remove':
-            cart.pop(pid, None)
+            carts.remove(cart, int(pid))
         else:
-            qty = int(request.POST.get('quantity', 1))
-            if qty <= 0:
-                cart.pop(pid, None)
-            else:
-                item = cart.get(pid, {})
-                item['quantity'] = qty
-                cart[pid] = item
-        request.session['cart'] = cart
+            carts.set_quantity(cart, int(pid), int(request.POST.get('quantity', 1)))
     return redirect('cart')
 
 
@@ -166,58 +174,43 @@ class CustomLoginView(DjangoLoginView):
             return reverse('buyer_dashboard')
 
 
+def _checkout_items(request, cart=None):
+    """Priced items for checkout from the buy_now payload or the cart; ``None`` if the product is gone."""
+    buy_now = request.session.get('buy_now')
+    if buy_now:
+        try:
+            product = Product.objects.get(id=int(buy_now.get('product_id')))
+        except Product.DoesNotExist:
+            return None
+        lines = [(product, int(buy_now.get('quantity', 1)))]
+    else:
+        lines = carts.lines(cart if cart is not None else carts.get_cart(request))
+    return pricing.price_lines(request.user, lines)
+
+
+def _parse_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
 @login_required(login_url='/accounts/login/')
 def checkout_view(request):
-    cart = request.session.get('cart', {})
+    cart = carts.get_cart(request)
     buy_now = request.session.get('buy_now')
 
     # If neither cart nor buy_now, nothing to checkout
-    if not cart and not buy_now:
+    if not buy_now and (cart is None or not cart.items.exists()):
         messages.error(request, 'Your cart is empty')
         return redirect('home')
 
-    # Build items list and subtotal either from buy_now (single item) or cart
-    items = []
-    subtotal = Decimal('0.00')
-
-    if buy_now:
-        try:
-            product = Product.objects.get(id=int(buy_now.get('product_id')))
-            qty = int(buy_now.get('quantity', 1))
-        except Product.DoesNotExist:
-            messages.error(request, 'Product not found')
-            return redirect('home')
-
-        unit_price = Decimal(str(product.price))
-        discount_pct = Decimal('0')
-        if request.user.is_authenticated and getattr(request.user, 'is_seller', False) and product.seller != request.user:
-            if qty >= 10:
-                discount_pct = Decimal('0.10')
-            elif qty >= 5:
-                discount_pct = Decimal('0.05')
-
-        effective_unit = (unit_price * (Decimal('1.0') - discount_pct)).quantize(Decimal('0.01'))
-        total_price = (effective_unit * qty).quantize(Decimal('0.01'))
-        items.append({'product': product, 'quantity': qty, 'unit_price': effective_unit, 'total_price': total_price, 'discount_pct': discount_pct})
-        subtotal += total_price
-    else:
-        # build from cart
-        product_ids = [int(pid) for pid in cart.keys()]
-        products = Product.objects.filter(id__in=product_ids)
-        for p in products:
-            qty = cart.get(str(p.id), {}).get('quantity', 0)
-            unit_price = Decimal(str(p.price))
-            discount_pct = Decimal('0')
-            if request.user.is_authenticated and getattr(request.user, 'is_seller', False) and p.seller != request.user:
-                if qty >= 10:
-                    discount_pct = Decimal('0.10')
-                elif qty >= 5:
-                    discount_pct = Decimal('0.05')
-
-            effective_unit = (unit_price * (Decimal('1.0') - discount_pct)).quantize(Decimal('0.01'))
-            total_price = (effective_unit * qty).quantize(Decimal('0.01'))
-            subtotal += total_price
-            items.append({'product': p, 'quantity': qty, 'unit_price': effective_unit, 'total_price': total_price, 'discount_pct': discount_pct})
+    # Build priced items either from buy_now (single item) or cart
+    priced = _checkout_items(request, cart)
+    if priced is None:
+        messages.error(request, 'Product not found')
+        return redirect('home')
+    items, subtotal = priced
 
     if request.method == 'POST':
         # create order using items computed above; get address and phone from POST (or user's defaults)
@@ -226,28 +219,9 @@ def checkout_view(request):
         # optional lat/lng captured from browser geolocation
         lat = request.POST.get('delivery_lat')
         lng = request.POST.get('delivery_lng')
-
-        def _parse_float(v):
-            try:
-                return float(v)
-            except Exception:
-                return None
-
         lat_f = _parse_float(lat)
         lng_f = _parse_float(lng)
 
-        # prepare delivery fee parameters (used per-item later)
-        try:
-            base_fee = float(getattr(settings, 'DELIVERY_BASE_FEE', 50.0))
-            per_km = float(getattr(settings, 'DELIVERY_PER_KM', 12.0))
-            store_lat = float(getattr(settings, 'STORE_LAT', 14.599512))
-            store_lng = float(getattr(settings, 'STORE_LNG', 120.984222))
-        except Exception:
-            base_fee = float(getattr(settings, 'DELIVERY_BASE_FEE', 50.0))
-            per_km = float(getattr(settings, 'DELIVERY_PER_KM', 12.0))
-            store_lat = float(getattr(settings, 'STORE_LAT', 14.599512))
-            store_lng = float(getattr(settings, 'STORE_LNG', 120.984222))
-
         # Save provided phone/address to user's profile so future orders and sidebar show correct contact info
         try:
             updated = False
@@ -263,66 +237,23 @@ def checkout_view(request):
             # ignore profile save failures in dev
             pass
 
-        order = Order.objects.create(
-            buyer=request.user,
-            delivery_address=address,
-            delivery_fee=0,
-            delivery_lat=lat_f,
-            delivery_lng=lng_f,
-            status='pending'
-        )
-
-        # Create order items and compute per-item delivery fees (based on seller coords)
-        total_item_fees = 0.0
-        R = 6371.0
-        for it in items:
-            seller = getattr(it['product'], 'seller', None)
-            # determine seller coords, fallback to store coordinates
-            s_lat = s_lng = None
-            if seller is not None:
-                try:
-                    s_lat = float(getattr(seller, 'seller_lat'))
-                    s_lng = float(getattr(seller, 'seller_lng'))
-                except Exception:
-                    s_lat = s_lng = None
-
-            if lat_f is not None and lng_f is not None:
-                if s_lat is not None and s_lng is not None:
-                    phi1 = math.radians(s_lat)
-                    phi2 = math.radians(lat_f)
-                    dphi = math.radians(lat_f - s_lat)
-                    dlambda = math.radians(lng_f - s_lng)
-                else:
-                    phi1 = math.radians(store_lat)
-                    phi2 = math.radians(lat_f)
-                    dphi = math.radians(lat_f - store_lat)
-                    dlambda = math.radians(lng_f - store_lng)
-
-                a = math.sin(dphi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda/2)**2
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-                distance_km = R * c
-                item_fee = round(base_fee + (per_km * distance_km), 2)
-            else:
-                item_fee = round(base_fee, 2)
-
-            total_item_fees += float(item_fee)
-            OrderItem.objects.create(
-                order=order,
-                product=it['product'],
-                quantity=it['quantity'],
-                price=it['unit_price'],
-                delivery_fee=item_fee
-            )
-
-        # persist the sum of per-item delivery fees on the order
-        order.delivery_fee = round(total_item_fees, 2)
-        order.save()
+        try:
+            order = place_order(request.user, items, address=address, lat=lat_f, lng=lng_f)
+        except OutOfStock as exc:
+            available = Product.objects.filter(pk=exc.product.pk).values_list('stock', flat=True).first() or 0
+            messages.error(request, f'Sorry, only {available} {exc.product.unit} of {exc.product.name} left in stock.')
+            if buy_now:
+                return redirect('product_detail', pk=exc.product.pk)
+            return redirect('cart')
+        except ValueError:
+            messages.error(request, 'Your cart is empty')
+            return redirect('home')
 
         # Clear buy_now or cart as appropriate
         if buy_now:
             request.session.pop('buy_now', None)
         else:
-            request.session['cart'] = {}
+            carts.clear(cart)
 
         messages.success(request, f'🎉 Order {order.order_number} placed successfully! Track your delivery in My Account.')
         return redirect('order_detail', pk=order.pk)
@@ -336,25 +267,62 @@ def checkout_view(request):
         'initial_address': initial_address,
         'initial_phone': initial_phone,
         'buy_now': bool(buy_now),
-        'STORE_LAT': getattr(settings, 'STORE_LAT', ''),
-        'STORE_LNG': getattr(settings, 'STORE_LNG', ''),
-        'DELIVERY_BASE_FEE': getattr(settings, 'DELIVERY_BASE_FEE', ''),
-        'DELIVERY_PER_KM': getattr(settings, 'DELIVERY_PER_KM', ''),
+    })
+
+
+@login_required(login_url='/accounts/login/')
+def checkout_quote(request):
+    """JSON delivery-fee quote for the current checkout items at ?lat=&lng=."""
+    priced = _checkout_items(request)
+    if priced is None:
+        return JsonResponse({'error': 'Product not found'}, status=404)
+    items, subtotal = priced
+    fees = delivery.quote(items, _parse_float(request.GET.get('lat')), _parse_float(request.GET.get('lng')))
+    return JsonResponse({
+        'items': [
+            {'product_id': it['product'].pk, 'name': it['product'].name, 'delivery_fee': str(fee)}
+            for it, fee in zip(items, fees['fees'])
+        ],
+        'subtotal': str(subtotal),
+        'delivery_fee': str(fees['total']),
+        'total': str(subtotal + fees['total']),
     })
 
 def order_detail(request, pk):
-    order = get_object_or_404(Order, pk=pk)
-    items = order.items.all()
-    subtotal = sum(item.total_price for item in items)
-    fees_total = sum(float(getattr(item, 'delivery_fee', 0)) for item in items)
-    return render(request, 'order_detail.html', {'order': order, 'subtotal': subtotal, 'fees_total': fees_total})
+    order = get_object_or_404(Order.objects.select_related('buyer'), pk=pk)
+    items = order.items.select_related('product')
+    return render(request, 'order_detail.html', {
+        'order': order,
+        'items': items,
+        'subtotal': order.items_subtotal,
+        'fees_total': order.grand_total - order.items_subtotal,
+    })
+
+
+BUYER_HISTORY_PAGE_SIZE = 20
+PENDING_PREVIEW_SIZE = 5
 
 
 @login_required
 def buyer_dashboard(request):
-    orders = request.user.orders.order_by('-created_at')
-    pending = orders.filter(status='pending')
-    context = {'orders': orders, 'pending': pending}
+    # summary rows only (stored totals, no items), keyset-paged so the page stays flat as history grows
+    summary = request.user.orders.only('buyer', 'order_number', 'status', 'created_at', 'grand_total')
+    status = request.GET.get('status') or None
+    if status not in dict(Order.ORDER_STATUS):
+        status = None
+    cursor = request.GET.get('after') or None
+    history = summary.filter(status=status) if status else summary
+    orders, next_cursor = keyset_page(history, cursor, BUYER_HISTORY_PAGE_SIZE)
+    pending, more_pending = keyset_page(summary.filter(status='pending'), None, PENDING_PREVIEW_SIZE)
+    context = {
+        'orders': orders,
+        'pending': pending,
+        'more_pending': bool(more_pending),
+        'status': status or '',
+        'statuses': Order.ORDER_STATUS,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+    }
     return render(request, 'buyer_dashboard.html', context)
 
 
@@ -362,39 +330,71 @@ def _is_seller(user):
     return user.is_authenticated and user.is_seller
 
 
+STORE_PAGE_SIZE = 24
+
+
+@caching.cache_anonymous_page(lambda request, pk: [caching.seller_store_namespace(pk)])
 def seller_store(request, pk):
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    seller = get_object_or_404(User, pk=pk)
-    products = Product.objects.filter(seller=seller).order_by('-created_at')
-    return render(request, 'seller_store.html', {'seller': seller, 'products': products})
+    # ?after=<cursor> pages through the store newest-first (see core.pagination)
+    cursor = request.GET.get('after') or None
+    if decode_cursor(cursor) is None:
+        cursor = None
+    # the rendered page is cached per seller and cursor; product/image changes bump the seller's namespace
+    key = caching.seller_store_key(pk, cursor)
+    store_html = cache.get(key)
+    caching.record('seller_store', store_html is not None)
+    if store_html is None:
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        seller = get_object_or_404(User, pk=pk)
+        products, next_cursor = keyset_page(
+            Product.objects.filter(seller=seller).for_listing(), cursor, STORE_PAGE_SIZE
+        )
+        store_html = render_to_string('seller_store_products.html', {
+            'seller': seller,
+            'products': products,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+        })
+        cache.set(key, store_html, caching.seller_store_timeout())
+    return render(request, 'seller_store.html', {'store_html': store_html})
+
+
+SELLER_ORDERS_PAGE_SIZE = 20
+IMPORT_ERRORS_SHOWN = 100
 
 
 @user_passes_test(_is_seller)
 def seller_dashboard(request):
     products = Product.objects.filter(seller=request.user)
-    # orders that include this seller's products
-    orders = Order.objects.filter(items__product__seller=request.user).distinct().order_by('-created_at')
-    pending = orders.filter(status='pending')
-
-    # Compute bulk discounted prices for display on seller dashboard only
+    # only this seller's lines of each order, one keyset page at a time (see core.seller_orders)
+    status = request.GET.get('status') or None
+    cursor = request.GET.get('after') or None
+    orders, next_cursor = seller_orders.orders_page(request.user, status, cursor, SELLER_ORDERS_PAGE_SIZE)
+    pending, more_pending = seller_orders.orders_page(request.user, 'pending', page_size=PENDING_PREVIEW_SIZE)
+
+    # bulk tier prices for display on the seller dashboard
+    tiers = pricing.load_tiers()
     for p in products:
-        try:
-            price = float(p.price)
-        except Exception:
-            price = 0.0
-        # 5+ pieces -> 5% off, 10+ pieces -> 10% off
-        p.bulk_price_5 = price * 0.95
-        p.bulk_price_10 = price * 0.90
-
-    return render(request, 'seller_dashboard.html', {'products': products, 'orders': orders, 'pending': pending})
+        p.tier_prices = pricing.tier_prices(p, tiers)
+
+    return render(request, 'seller_dashboard.html', {
+        'products': products,
+        'orders': orders,
+        'pending': pending,
+        'more_pending': bool(more_pending),
+        'status': status if status in seller_orders.STATUSES else '',
+        'statuses': Order.ORDER_STATUS,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+    })
 
 
 @user_passes_test(_is_seller)
 @require_http_methods(['GET', 'POST'])
 def seller_add_product(request):
     if request.method == 'POST':
-        form = ProductForm(request.POST, request.FILES)
+        form = ProductForm(request.POST, request.FILES, instance=Product(seller=request.user))
         if form.is_valid():
             form.save(seller=request.user)
             messages.success(request, 'Product added')
@@ -404,6 +404,37 @@ def seller_add_product(request):
     return render(request, 'seller_product_form.html', {'form': form, 'action': 'Add Product'})
 
 
+@user_passes_test(_is_seller)
+@require_http_methods(['GET', 'POST'])
+def seller_import_products(request):
+    # bulk onboarding: stream a CSV/JSONL catalog (plus an optional images zip) through core.catalog_import
+    stats = None
+    if request.method == 'POST':
+        form = CatalogImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            images = None
+            try:
+                images = catalog_import.ImageSource(form.cleaned_data['images'])
+                stats = catalog_import.import_catalog(
+                    request.user, upload, catalog_import.guess_format(upload.name), images=images
+                )
+            except (ValueError, csv.Error, zipfile.BadZipFile) as exc:
+                form.add_error(None, f'Could not read the upload: {exc}')
+            finally:
+                if images is not None:
+                    images.close()
+            if stats is not None:
+                messages.success(request, f"Imported {stats['created']} product(s) and {stats['images']} image(s)")
+    else:
+        form = CatalogImportForm()
+    return render(request, 'seller_import.html', {
+        'form': form,
+        'stats': stats,
+        'errors': stats['errors'][:IMPORT_ERRORS_SHOWN] if stats else [],
+    })
+
+
 @user_passes_test(_is_seller)
 @require_http_methods(['GET', 'POST'])
 def seller_edit_product(request, pk):
@@ -430,32 +461,106 @@ def seller_delete_product(request, pk):
     return render(request, 'seller_confirm_delete.html', {'product': product})
 
 
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+
 @user_passes_test(lambda u: u.is_superuser)
 def admin_dashboard(request):
-    from django.db.models import Sum
-    
-    total_products = Product.objects.count()
-    total_orders = Order.objects.count()
     from django.contrib.auth import get_user_model
     User = get_user_model()
-    total_users = User.objects.count()
-    
-    # Calculate total sales (sum of all order totals)
-    total_sales = 0
-    for order in Order.objects.all():
-        total_sales += float(order.total)
-    
-    pending_orders = Order.objects.filter(status='pending').count()
-    
+
+    # optional ?start=YYYY-MM-DD&end=YYYY-MM-DD&period=day|week
+    start = _date_param(request, 'start')
+    end = _date_param(request, 'end')
+    period = request.GET.get('period') if request.GET.get('period') in metrics.PERIODS else 'day'
+    stats = metrics.dashboard(start=start, end=end, period=period)
+
     return render(request, 'admin_dashboard.html', {
-        'total_products': total_products,
-        'total_orders': total_orders,
-        'total_users': total_users,
-        'total_sales': total_sales,
-        'pending_orders': pending_orders,
+        'total_products': Product.objects.count(),
+        'total_orders': stats['total_orders'],
+        'total_users': User.objects.count(),
+        'total_sales': stats['total_sales'],
+        'pending_orders': stats['status_counts']['pending'],
+        'status_counts': stats['status_counts'],
+        'sales_by_period': stats['sales_by_period'],
+        'top_sellers': stats['top_sellers'],
+        'top_categories': stats['top_categories'],
+        'start': start,
+        'end': end,
+        'period': period,
+        'cache_stats': caching.stats(),
     })
 
 
+def healthz(request):
+    # load balancer health check: every configured database must answer
+    from django.db import connections
+    status = {}
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            status[alias] = 'ok'
+        except Exception as exc:
+            status[alias] = f'error: {exc.__class__.__name__}'
+    healthy = all(value == 'ok' for value in status.values())
+    body = {'status': 'ok' if healthy else 'unavailable', 'databases': status}
+    if healthy:
+        # a stuck queue doesn't take the app out of rotation, but it should be noticed
+        body['tasks'] = tasks.backlog()
+        if body['tasks']['status'] != 'ok':
+            tasks.logger.warning('%(due)s task(s) queued, oldest due %(oldest_seconds)ss ago; is run_worker running?', body['tasks'])
+    return JsonResponse(body, status=200 if healthy else 503)
+
+
+@user_passes_test(lambda u: u.is_staff)
+def performance_stats(request):
+    # per-URL-name percentiles of this worker process's recent requests; ?reset=1 clears them
+    from .instrumentation import stats
+    summary = stats.summary()
+    if request.GET.get('reset') == '1':
+        stats.reset()
+    return JsonResponse({'views': summary})
+
+
+def prometheus_metrics(request):
+    # scraped by Prometheus with "Authorization: Bearer <METRICS_TOKEN>"; staff can also read it
+    if not prometheus.authorized(request):
+        if not settings.METRICS_TOKEN:
+            raise Http404
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(prometheus.render(), content_type=prometheus.CONTENT_TYPE)
+
+
+@login_required
+def export_orders(request):
+    # ?format=csv|jsonl&start=&end=&status=...; sellers get their own lines, superusers everything (or ?seller=<id>)
+    from django.contrib.auth import get_user_model
+    user = request.user
+    if user.is_superuser:
+        seller_id = request.GET.get('seller', '')
+        seller = get_object_or_404(get_user_model(), pk=int(seller_id)) if seller_id.isdigit() else None
+    elif user.is_seller:
+        seller = user
+    else:
+        return HttpResponseForbidden('Only sellers and administrators can export orders')
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        fmt = 'csv'
+    statuses = [st for st in request.GET.getlist('status') if st in dict(Order.ORDER_STATUS)]
+    start = _date_param(request, 'start')
+    end = _date_param(request, 'end')
+    rows = exports.export_rows(start=start, end=end, statuses=statuses, seller=seller)
+    response = StreamingHttpResponse(exports.stream(fmt, rows), content_type=exports.FORMATS[fmt])
+    stamp = '-'.join(str(d) for d in (start, end) if d) or 'all'
+    response['Content-Disposition'] = f'attachment; filename="orders-{stamp}.{fmt}"'
+    return response
+
+
 @user_passes_test(_is_seller)
 def seller_update_order_status(request, pk):
     # seller may update status for orders that include their products
@@ -467,8 +572,18 @@ def seller_update_order_status(request, pk):
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in dict(Order.ORDER_STATUS).keys():
-            order.status = new_status
-            order.save()
+            with transaction.atomic():
+                # re-read under a row lock so two concurrent updates can't both move the ledger
+                order = Order.objects.select_for_update().get(pk=order.pk)
+                old_status = order.status
+                order.status = new_status
+                # only the status changes; the stored totals are left as checkout wrote them
+                order.save(update_fields=['status'])
+                ledger.order_status_changed(order, old_status)
+                if old_status != new_status:
+                    tasks.notify_order_status.delay(order_id=order.pk)
+            if old_status != new_status:
+                prometheus.ORDER_STATUS_TRANSITIONS.inc(from_status=old_status, to_status=new_status)
             messages.success(request, f'Order {order.order_number} updated to {new_status}')
     # redirect with cache-busting to ensure fresh page load
     response = redirect('seller_dashboard')
@@ -0,0 +1,36 @@
+"""Build ``CACHES`` from ``CACHE_URL``.
+
+``locmem://`` (the default) keeps a cache per process; ``file:///var/cache/market``
+shares one on disk between the processes of a single host; ``redis://host:6379/0``
+(or ``rediss://``) shares it between hosts and needs the ``redis`` package.
+"""
+import os
+from urllib.parse import urlsplit
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def parse_cache_url(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in BACKENDS:
+        raise ValueError(f'Unsupported cache URL scheme {parts.scheme!r}')
+    config = {'BACKEND': BACKENDS[scheme], 'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'market')}
+    if scheme == 'locmem':
+        config['LOCATION'] = parts.netloc or 'market'
+        config['OPTIONS'] = {'MAX_ENTRIES': 10000}
+    elif scheme == 'file':
+        config['LOCATION'] = parts.path
+    elif scheme in ('redis', 'rediss'):
+        config['LOCATION'] = url
+    return config
+
+
+def caches(default_url='locmem://'):
+    return {'default': parse_cache_url(os.environ.get('CACHE_URL', '').strip() or default_url)}
@@ -0,0 +1,78 @@
+"""Build ``DATABASES`` entries from the environment.
+
+``DATABASE_URL`` selects the primary database, e.g.
+``postgres://market:secret@db:5432/market?sslmode=require``; without it a
+local SQLite file is used. Query-string parameters become ``OPTIONS`` (for
+PostgreSQL: ``sslmode``, ``connect_timeout``, ``application_name``, ...).
+"""
+import os
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+POSTGRES_SCHEMES = {'postgres', 'postgresql', 'pgsql'}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+def sqlite_config(path):
+    # WAL lets readers run while a write is in progress; IMMEDIATE takes the write lock
+    # when the transaction starts, so concurrent checkouts queue on the busy timeout
+    # instead of failing with "database is locked" when a reader upgrades to a writer.
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+
+
+def parse_database_url(url):
+    """Return a ``DATABASES`` entry for a ``postgres://`` or ``sqlite:///`` URL."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme == 'sqlite':
+        # sqlite:///relative.db, sqlite:////absolute/path.db
+        path = unquote(parts.path[1:] if parts.path.startswith('/') else parts.path)
+        return sqlite_config(path or ':memory:')
+    if scheme not in POSTGRES_SCHEMES:
+        raise ValueError(f'Unsupported database URL scheme {parts.scheme!r}')
+
+    options = dict(parse_qsl(parts.query))
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parts.path.lstrip('/')),
+        'USER': unquote(parts.username or ''),
+        'PASSWORD': unquote(parts.password or ''),
+        'HOST': parts.hostname or '',
+        'PORT': str(parts.port or ''),
+        # keep connections open between requests and check them before reuse
+        'CONN_MAX_AGE': _env_int('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': True,
+        # behind PgBouncer in transaction mode server-side cursors (used by .iterator()) must be off
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
+        'OPTIONS': options,
+    }
+    pool_size = _env_int('DB_POOL_MAX_SIZE', 0)
+    if pool_size:
+        # psycopg 3 connection pool inside each process; Django requires CONN_MAX_AGE=0 with it
+        config['OPTIONS']['pool'] = {'min_size': _env_int('DB_POOL_MIN_SIZE', 2), 'max_size': pool_size}
+        config['CONN_MAX_AGE'] = 0
+    return config
+
+
+def databases(default_sqlite_path):
+    """``DATABASES`` from ``DATABASE_URL`` and ``DATABASE_REPLICA_URLS`` (comma-separated)."""
+    url = os.environ.get('DATABASE_URL', '').strip()
+    result = {'default': parse_database_url(url) if url else sqlite_config(default_sqlite_path)}
+    replica_urls = [u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    for number, replica_url in enumerate(replica_urls, start=1):
+        replica = parse_database_url(replica_url)
+        # tests run against the primary only
+        replica['TEST'] = {'MIRROR': 'default'}
+        result[f'replica{number}'] = replica
+    return result
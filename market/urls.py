@@ -5,6 +5,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/', include('core.api_urls')),
     path('', include('core.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
 ]